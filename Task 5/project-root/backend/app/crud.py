@@ -1,10 +1,20 @@
+from datetime import datetime, timedelta
+from sqlalchemy import and_, delete, func, insert, or_, select, text, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from . import models, auth
-from typing import Optional
+from .database import bookkeeping, primary_only, read_only
+from .member_events import member_dict, member_events
+from typing import Optional, Tuple
 
+# Keep IN (...) lists well under every backend's bound-parameter limit
+BATCH_CHUNK = 500
+
+@read_only
 def get_user_by_username(db: Session, username: str):
     return db.query(models.User).filter(models.User.username == username).first()
 
+@read_only
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
@@ -17,7 +27,9 @@ def create_user(db: Session, username: str, email: str, password: str):
     return user
 
 def authenticate_user(db: Session, identifier: str, password: str):
-    user = get_user_by_email(db, identifier) if "@" in identifier else get_user_by_username(db, identifier)
+    # A user who registered a moment ago may not have reached the replicas yet
+    with primary_only(db):
+        user = get_user_by_email(db, identifier) if "@" in identifier else get_user_by_username(db, identifier)
     if not user:
         return None
     if not auth.verify_password(password, user.hashed_password):
@@ -25,8 +37,61 @@ def authenticate_user(db: Session, identifier: str, password: str):
     return user
 
 # Members CRUD
-def list_members(db: Session):
-    return db.query(models.Member).order_by(models.Member.id.desc()).all()
+# Columns served by the list endpoint, in schemas.MemberOut key order
+MEMBER_FIELDS = ("name", "email", "phone", "organization", "id")
+
+# Deleted members are kept as tombstones (deleted_at set) for delta sync
+LIVE = models.Member.deleted_at.is_(None)
+
+
+@read_only
+def member_list_version(db: Session, user_id: int) -> int:
+    return db.scalar(select(models.MemberListVersion.version).where(models.MemberListVersion.user_id == user_id)) or 0
+
+
+def _stamp_member_change(db: Session, user_id: int) -> datetime:
+    """Count a change to ``user_id``'s members and return the ``updated_at`` to stamp it with.
+
+    Call it before touching any member row. The bump locks the owner's version
+    row until commit, so one owner's writers stamp and commit one at a time, and
+    each stamp is kept above the previous one (even on a host whose clock is
+    behind): delta sync can then treat stamp order as commit order.
+    """
+    versions = models.MemberListVersion
+    bump = (
+        update(versions).where(versions.user_id == user_id).values(version=versions.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if not db.execute(bump).rowcount:
+        try:
+            with db.begin_nested():
+                db.execute(insert(versions).values(user_id=user_id, version=1))
+        except IntegrityError:
+            # Another transaction created the row first
+            db.execute(bump)
+    # Locking read: sees the latest committed stamp, not this transaction's snapshot
+    previous = db.scalar(select(versions.changed_at).where(versions.user_id == user_id).with_for_update())
+    stamp = datetime.utcnow()
+    if previous is not None and stamp <= previous:
+        stamp = previous + timedelta(microseconds=1)
+    db.execute(
+        update(versions).where(versions.user_id == user_id).values(changed_at=stamp)
+        .execution_options(synchronize_session=False)
+    )
+    return stamp
+
+
+@read_only
+def list_members(db: Session, user_id: int, before_id: Optional[int] = None, limit: int = 50):
+    """One page of a user's members as plain row tuples (MEMBER_FIELDS order),
+    newest first, strictly older than ``before_id``."""
+    q = (
+        select(*(getattr(models.Member, field) for field in MEMBER_FIELDS))
+        .where(models.Member.user_id == user_id, LIVE)
+    )
+    if before_id is not None:
+        q = q.where(models.Member.id < before_id)
+    return db.execute(q.order_by(models.Member.id.desc()).limit(limit)).all()
 
 def create_member(
     db: Session, 
@@ -36,32 +101,259 @@ def create_member(
     organization: Optional[str] = None, 
     user_id: Optional[int] = None
 ):
+    stamp = _stamp_member_change(db, user_id)
     m = models.Member(
         name=name, 
         email=email, 
         phone=phone, 
         organization=organization,
-        user_id=user_id
+        user_id=user_id,
+        updated_at=stamp,
     )
     db.add(m)
     db.commit()
     db.refresh(m)
+    member_events.publish(m.user_id, {"type": "created", "member": member_dict(m)})
     return m
 
-def update_member(db: Session, member_id: int, **data):
-    m = db.query(models.Member).filter(models.Member.id == member_id).first()
+def update_member(db: Session, member_id: int, user_id: int, **data):
+    m = db.query(models.Member).filter(models.Member.id == member_id, models.Member.user_id == user_id, LIVE).first()
     if not m:
         return None
     for k, v in data.items():
         setattr(m, k, v)
+    m.updated_at = _stamp_member_change(db, m.user_id)
     db.commit()
     db.refresh(m)
+    member_events.publish(m.user_id, {"type": "updated", "member": member_dict(m)})
     return m
 
-def delete_member(db: Session, member_id: int):
-    m = db.query(models.Member).filter(models.Member.id == member_id).first()
+def delete_member(db: Session, member_id: int, user_id: int):
+    m = db.query(models.Member).filter(models.Member.id == member_id, models.Member.user_id == user_id, LIVE).first()
     if not m:
         return False
-    db.delete(m)
+    owner_id = m.user_id
+    m.deleted_at = m.updated_at = _stamp_member_change(db, owner_id)
     db.commit()
+    member_events.publish(owner_id, {"type": "deleted", "id": member_id})
     return True
+
+
+def _chunks(items, size=BATCH_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _owned_ids(db: Session, user_id: int, ids):
+    owned = set()
+    for chunk in _chunks(ids):
+        owned.update(db.scalars(
+            select(models.Member.id).where(models.Member.id.in_(chunk), models.Member.user_id == user_id, LIVE)
+        ))
+    return owned
+
+
+def _insert_members(db: Session, dialect, rows):
+    """Insert member rows; returns their new ids in ``rows`` order."""
+    if dialect.insert_executemany_returning:
+        return list(db.scalars(insert(models.Member).returning(models.Member.id, sort_by_parameter_order=True), rows))
+    if dialect.name == "mysql":
+        # No RETURNING: one multi-row INSERT per chunk instead. InnoDB gives such a
+        # "simple insert" consecutive ids from LAST_INSERT_ID() in every
+        # innodb_autoinc_lock_mode, spaced by auto_increment_increment.
+        step = db.scalar(text("SELECT @@auto_increment_increment"))
+        new_ids = []
+        for chunk in _chunks(rows):
+            first = db.execute(insert(models.Member).values(chunk)).lastrowid
+            new_ids.extend(range(first, first + step * len(chunk), step))
+        return new_ids
+    # Anything else without RETURNING: the ORM flush, one INSERT per row
+    members = [models.Member(**row) for row in rows]
+    db.add_all(members)
+    db.flush()
+    return [m.id for m in members]
+
+
+def apply_member_batch(db: Session, user_id: int, operations):
+    """Apply mixed create/update/delete operations for one owner in a single transaction.
+
+    Creates run first, then updates, then deletes (as tombstones), each as a
+    handful of bulk statements. Returns one result dict per operation, in request order.
+    Raises on database errors after rolling the whole batch back.
+    """
+    results = [None] * len(operations)
+    creates, updates, deletes = [], [], []
+    for index, operation in enumerate(operations):
+        needs_id = operation.op != "create"
+        needs_data = operation.op != "delete"
+        if (needs_id and operation.id is None) or (needs_data and operation.data is None):
+            missing = "id" if needs_id and operation.id is None else "data"
+            results[index] = {"index": index, "op": operation.op, "status": "invalid", "id": operation.id,
+                              "detail": f"{operation.op} needs {missing}"}
+        elif operation.op == "create":
+            creates.append(index)
+        elif operation.op == "update":
+            updates.append(index)
+        else:
+            deletes.append(index)
+
+    dialect = db.get_bind().dialect
+    try:
+        # Stamp first: the whole batch shares one updated_at, taken under the owner's lock
+        now = _stamp_member_change(db, user_id) if creates or updates or deletes else None
+        if creates:
+            rows = [{**operations[i].data.dict(), "user_id": user_id, "updated_at": now} for i in creates]
+            new_ids = _insert_members(db, dialect, rows)
+            for i, new_id in zip(creates, new_ids):
+                results[i] = {"index": i, "op": "create", "status": "created", "id": new_id}
+
+        if updates:
+            owned = _owned_ids(db, user_id, [operations[i].id for i in updates])
+            rows = [{"id": operations[i].id, **operations[i].data.dict(), "updated_at": now}
+                    for i in updates if operations[i].id in owned]
+            if rows:
+                # ORM bulk UPDATE by primary key: one executemany
+                db.execute(update(models.Member), rows)
+            for i in updates:
+                status = "updated" if operations[i].id in owned else "not_found"
+                results[i] = {"index": i, "op": "update", "status": status, "id": operations[i].id}
+
+        if deletes:
+            ids = [operations[i].id for i in deletes]
+            deleted = set()
+            for chunk in _chunks(ids):
+                stmt = (
+                    update(models.Member)
+                    .where(models.Member.id.in_(chunk), models.Member.user_id == user_id, LIVE)
+                    .values(deleted_at=now, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                if dialect.update_returning:
+                    deleted.update(db.scalars(stmt.returning(models.Member.id)))
+                else:
+                    found = _owned_ids(db, user_id, chunk)
+                    db.execute(stmt)
+                    deleted.update(found)
+            for i in deletes:
+                status = "deleted" if operations[i].id in deleted else "not_found"
+                results[i] = {"index": i, "op": "delete", "status": status, "id": operations[i].id}
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    for result in results:
+        if result["status"] in ("created", "updated"):
+            member = {**operations[result["index"]].data.dict(), "id": result["id"]}
+            member_events.publish(user_id, {"type": result["status"], "member": member})
+        elif result["status"] == "deleted":
+            member_events.publish(user_id, {"type": "deleted", "id": result["id"]})
+    return results
+
+
+
+# Delta sync
+def tombstone_watermark(db: Session, user_id: int) -> Optional[datetime]:
+    """Newest tombstone compaction removed for ``user_id``, if any."""
+    watermark = db.get(models.MemberTombstoneWatermark, user_id)
+    return watermark.compacted_until if watermark is not None else None
+
+
+@read_only
+def member_sync_mark(db: Session, user_id: int) -> Tuple[datetime, int]:
+    """Position of the newest change for ``user_id`` (tombstones included).
+
+    Never below the compaction watermark: if the newest change was a tombstone
+    that compaction removed, a lower mark would already be expired.
+    """
+    newest = db.scalar(select(func.max(models.Member.updated_at)).where(models.Member.user_id == user_id))
+    watermark = tombstone_watermark(db, user_id)
+    return (max(newest or datetime.min, watermark or datetime.min), 0)
+
+
+def is_sync_mark_compacted(db: Session, user_id: int, since: Tuple[datetime, int],
+                           floor: Optional[datetime] = None) -> bool:
+    """True when tombstones after ``since`` may already be gone (client must resync).
+
+    ``floor`` is where a paged snapshot started: the client never held rows
+    whose tombstones were already compacted before it.
+    """
+    watermark = tombstone_watermark(db, user_id)
+    return watermark is not None and max(since[0], floor or datetime.min) < watermark
+
+
+@read_only
+def list_member_changes(db: Session, user_id: int, since: Optional[Tuple[datetime, int]] = None, limit: int = 200):
+    """Members written after ``since`` in (updated_at, id) order, tombstones included.
+
+    Rows are (*MEMBER_FIELDS, updated_at, deleted_at). Without ``since`` only
+    live members are returned (a full snapshot).
+    """
+    m = models.Member
+    q = select(*(getattr(m, field) for field in MEMBER_FIELDS), m.updated_at, m.deleted_at).where(m.user_id == user_id)
+    if since is None:
+        q = q.where(LIVE)
+    else:
+        updated_at, last_id = since
+        # The plain >= bound lets the index seek to ``since``; the OR only breaks ties
+        q = q.where(m.updated_at >= updated_at, or_(m.updated_at > updated_at, m.id > last_id))
+    return db.execute(q.order_by(m.updated_at, m.id).limit(limit)).all()
+
+
+def record_sync_client(db: Session, client_id: str, user_id: int, synced_until: datetime):
+    """Remember that ``client_id`` holds every change up to ``synced_until``.
+
+    Only compaction reads these rows, so the commit doesn't pin the user's
+    reads to the primary.
+    """
+    with bookkeeping(db):
+        client = db.get(models.MemberSyncClient, client_id)
+        if client is None or client.user_id != user_id:
+            if client is not None:
+                db.delete(client)
+                db.flush()
+            client = models.MemberSyncClient(client_id=client_id, user_id=user_id)
+            db.add(client)
+        client.synced_until = synced_until
+        client.last_seen = datetime.utcnow()
+        db.commit()
+
+
+def compact_member_tombstones(db: Session, retention: timedelta, client_ttl: timedelta) -> int:
+    """Delete tombstones every active client has synced past; returns rows removed.
+
+    Tombstones are always kept for ``retention``. Clients not seen for
+    ``client_ttl`` stop holding tombstones back (they resync from scratch).
+    """
+    now = datetime.utcnow()
+    clients = models.MemberSyncClient
+    db.execute(delete(clients).where(clients.last_seen < now - client_ttl))
+
+    default_horizon = now - retention
+    # Tombstones never change after deletion, so deleted_at == updated_at and no horizon
+    # is past default_horizon. Only expired tombstones come back, each one about to go anyway.
+    owners = set(db.scalars(select(models.Member.user_id).where(models.Member.deleted_at < default_horizon)))
+
+    removed = 0
+    for user_id in owners:
+        client_horizon = db.scalar(select(func.min(clients.synced_until)).where(clients.user_id == user_id))
+        horizon = min(default_horizon, client_horizon or default_horizon)
+        expired = and_(
+            models.Member.user_id == user_id,
+            models.Member.deleted_at.is_not(None),
+            models.Member.updated_at < horizon,
+        )
+        # The watermark is the newest tombstone removed, so only tokens older than it resync
+        newest = db.scalar(select(func.max(models.Member.updated_at)).where(expired))
+        if newest is None:
+            continue
+        result = db.execute(delete(models.Member).where(expired).execution_options(synchronize_session=False))
+        removed += result.rowcount
+        watermark = db.get(models.MemberTombstoneWatermark, user_id)
+        if watermark is None:
+            db.add(models.MemberTombstoneWatermark(user_id=user_id, compacted_until=newest))
+        else:
+            watermark.compacted_until = max(watermark.compacted_until, newest)
+    db.commit()
+    return removed
@@ -1,6 +1,12 @@
+import functools
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import random
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.sql.dml import UpdateBase
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,6 +15,120 @@ DATABASE_URL = os.environ.get("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL not set in .env")
 
+# Optional read replicas (comma-separated URLs), and how long a writer keeps reading the primary
+DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+READ_YOUR_WRITES_SECONDS = float(os.environ.get("READ_YOUR_WRITES_SECONDS", "5"))
+# Sent after a write with the unix time the client should stay on the primary until; clients send it back
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes-Until"
+
 engine = create_engine(DATABASE_URL, echo=False, future=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+replica_engines = [create_engine(url, echo=False, future=True) for url in DATABASE_REPLICA_URLS]
+
+
+class RecentWriters:
+    """Owners who committed a write in the last ``window`` seconds (replicas may still lag).
+
+    Only this process's writes: other workers learn about them from the
+    client, which echoes the READ_YOUR_WRITES_HEADER it was sent (``info["pinned_until"]``).
+    """
+
+    def __init__(self, window: float = READ_YOUR_WRITES_SECONDS):
+        self.window = window
+        self._until = {}
+        self._lock = threading.Lock()
+
+    def mark(self, owner):
+        now = time.monotonic()
+        with self._lock:
+            self._until[owner] = now + self.window
+            if len(self._until) > 10000:
+                self._until = {k: t for k, t in self._until.items() if t > now}
+
+    def is_recent(self, owner) -> bool:
+        with self._lock:
+            return self._until.get(owner, 0) > time.monotonic()
+
+
+recent_writers = RecentWriters()
+
+
+class RoutingSession(Session):
+    """Session that sends reads made inside ``read_only`` crud functions to a replica.
+
+    Everything else, every write, and every read by a session (or, via
+    ``info["owner"]``, a user) that wrote recently goes to the primary.
+    Writes inside ``bookkeeping`` still go to the primary but don't count.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, UpdateBase):
+            if not self.info.get("bookkeeping"):
+                self.info["wrote"] = True
+            return engine
+        if replica_engines and self._may_use_replica():
+            # One replica per session, so all its reads see the same snapshot
+            return self.info.setdefault("replica", random.choice(replica_engines))
+        return engine
+
+    def _may_use_replica(self) -> bool:
+        info = self.info
+        if not info.get("read_only") or info.get("force_primary") or info.get("wrote"):
+            return False
+        if info.get("pinned_until", 0) > time.time():
+            return False
+        owner = info.get("owner")
+        return owner is None or not recent_writers.is_recent(owner)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def remember_writer(session):
+    if session.info.get("wrote") and session.info.get("owner") is not None:
+        recent_writers.mark(session.info["owner"])
+
+
+def read_only(fn):
+    """Mark a crud function (``db`` first) as safe to serve from a replica."""
+    @functools.wraps(fn)
+    def wrapper(db, *args, **kwargs):
+        previous = db.info.get("read_only", False)
+        db.info["read_only"] = True
+        try:
+            return fn(db, *args, **kwargs)
+        finally:
+            db.info["read_only"] = previous
+    return wrapper
+
+
+@contextmanager
+def primary_only(db):
+    """Read from the primary even inside ``read_only`` functions (read-before-write checks)."""
+    previous = db.info.get("force_primary", False)
+    db.info["force_primary"] = True
+    try:
+        yield db
+    finally:
+        db.info["force_primary"] = previous
+
+
+@contextmanager
+def bookkeeping(db):
+    """Writes that change nothing the user reads back (no read-your-writes pinning)."""
+    previous = db.info.get("bookkeeping", False)
+    db.info["bookkeeping"] = True
+    try:
+        yield db
+    finally:
+        db.info["bookkeeping"] = previous
+
+
+def pin_until_from_header(value) -> float:
+    """Parse a client's READ_YOUR_WRITES_HEADER; never longer than one window from now."""
+    try:
+        until = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return min(until, time.time() + READ_YOUR_WRITES_SECONDS)
+
+
+SessionLocal = sessionmaker(bind=engine, class_=RoutingSession, autoflush=False, autocommit=False)
 Base = declarative_base()
@@ -1,20 +1,60 @@
+import asyncio
+import base64
+import hashlib
 import os
-from fastapi import FastAPI, Depends, HTTPException, Header
+import secrets
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+import orjson
+from fastapi import FastAPI, Depends, HTTPException, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
+from sqlalchemy import event, inspect, text
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 from jose import jwt, JWTError
 
-from .database import SessionLocal, engine, Base
+from .database import (
+    READ_YOUR_WRITES_HEADER, READ_YOUR_WRITES_SECONDS, SessionLocal, engine, Base, pin_until_from_header, primary_only,
+)
 from . import models, schemas, crud, auth
+from .principal_cache import Principal, principal_cache
+from .member_events import member_events
 
 # Load .env
 load_dotenv()
 
-# Create tables
+# Create tables (and columns/indexes added to tables that already existed)
 Base.metadata.create_all(bind=engine)
 
+
+def upgrade_members_table():
+    columns = {c["name"] for c in inspect(engine).get_columns("members")}
+    with engine.begin() as conn:
+        for name in ("updated_at", "deleted_at"):
+            if name not in columns:
+                column_type = models.Member.__table__.c[name].type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE members ADD COLUMN {name} {column_type}"))
+        if "updated_at" not in columns:
+            # Bind a Python datetime so the stored value has the same format as the
+            # ones the app writes (SQLite compares them as strings)
+            members = models.Member.__table__
+            conn.execute(members.update().where(members.c.updated_at.is_(None)).values(updated_at=datetime.utcnow()))
+    if "changed_at" not in {c["name"] for c in inspect(engine).get_columns("member_list_versions")}:
+        column_type = models.MemberListVersion.__table__.c.changed_at.type.compile(dialect=engine.dialect)
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE member_list_versions ADD COLUMN changed_at {column_type}"))
+    for table in (models.Member.__table__, models.MemberSyncClient.__table__):
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+upgrade_members_table()
+
 # App init
 app = FastAPI(title="React-Vite + FastAPI Starter")
 
@@ -29,11 +69,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[READ_YOUR_WRITES_HEADER],
 )
 
+
+class ReadYourWritesMiddleware:
+    """Tell the client how long to keep its reads on the primary after a write.
+
+    The in-process RecentWriters only covers this worker; the client echoes the
+    header back, so whichever worker serves its next read honours it (see get_db).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                db = scope.get("state", {}).get("db")
+                if db is not None and db.info.get("wrote"):
+                    until = f"{time.time() + READ_YOUR_WRITES_SECONDS:.3f}"
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (READ_YOUR_WRITES_HEADER.lower().encode("latin-1"), until.encode("latin-1"))
+                    ]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+app.add_middleware(ReadYourWritesMiddleware)
+
+
 # Dependency: DB session
-def get_db():
+def get_db(request: Request):
     db = SessionLocal()
+    db.info["pinned_until"] = pin_until_from_header(request.headers.get(READ_YOUR_WRITES_HEADER))
+    request.state.db = db
     try:
         yield db
     finally:
@@ -42,6 +117,43 @@ def get_db():
 # JWT secret
 JWT_SECRET = os.environ.get("JWT_SECRET", "dev-secret-please-change")
 
+# ---------------- TOMBSTONE COMPACTION ----------------
+# How often to run, minimum tombstone age, and when an idle client stops holding them back
+TOMBSTONE_COMPACT_INTERVAL = float(os.environ.get("TOMBSTONE_COMPACT_INTERVAL", "300"))
+TOMBSTONE_RETENTION = timedelta(hours=float(os.environ.get("TOMBSTONE_RETENTION_HOURS", "24")))
+SYNC_CLIENT_TTL = timedelta(days=float(os.environ.get("SYNC_CLIENT_TTL_DAYS", "30")))
+
+
+def compact_tombstones_once() -> int:
+    db = SessionLocal()
+    try:
+        return crud.compact_member_tombstones(db, TOMBSTONE_RETENTION, SYNC_CLIENT_TTL)
+    finally:
+        db.close()
+
+
+async def compact_tombstones_forever():
+    while True:
+        await asyncio.sleep(TOMBSTONE_COMPACT_INTERVAL)
+        try:
+            await run_in_threadpool(compact_tombstones_once)
+        except SQLAlchemyError:
+            pass  # try again next interval
+
+
+@app.on_event("startup")
+async def start_tombstone_compaction():
+    if TOMBSTONE_COMPACT_INTERVAL > 0:
+        app.state.compaction_task = asyncio.create_task(compact_tombstones_forever())
+
+
+@app.on_event("shutdown")
+async def stop_tombstone_compaction():
+    task = getattr(app.state, "compaction_task", None)
+    if task is not None:
+        task.cancel()
+
+
 # ---------------- AUTH ----------------
 class LoginPayload(BaseModel):
     identifier: str
@@ -50,7 +162,9 @@ class LoginPayload(BaseModel):
 
 @app.post("/api/auth/register", response_model=dict)
 def api_register(payload: schemas.UserCreate, db: Session = Depends(get_db)):
-    if crud.get_user_by_username(db, payload.username) or crud.get_user_by_email(db, payload.email):
+    with primary_only(db):
+        taken = crud.get_user_by_username(db, payload.username) or crud.get_user_by_email(db, payload.email)
+    if taken:
         raise HTTPException(status_code=400, detail="Username or email already exists")
     user = crud.create_user(db, payload.username, payload.email, payload.password)
     return {"msg": "ok", "user_id": user.id}
@@ -74,8 +188,20 @@ def get_current_user_from_header(
     scheme, _, param = authorization.partition(" ")
     if scheme.lower() != "bearer" or not param:
         raise HTTPException(status_code=401, detail="Invalid authorization header")
+    principal = resolve_principal(param, db)
+    # Lets the routing session keep this user on the primary right after they write
+    db.info["owner"] = principal.id
+    return principal
+
+
+def resolve_principal(token: str, db: Session) -> Principal:
+    # Cached tokens skip both the JWT decode and the users lookup
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
     try:
-        payload = jwt.decode(param, JWT_SECRET, algorithms=["HS256"])
+        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
         user_id = payload.get("sub")
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
@@ -85,22 +211,210 @@ def get_current_user_from_header(
     user = db.query(models.User).filter(models.User.id == int(user_id)).first()
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
-    return user
+    principal = Principal(id=user.id, username=user.username, email=user.email)
+    principal_cache.put(token, principal, token_exp=payload.get("exp"))
+    return principal
+
+
+# Any change to a user drops the tokens cached for them
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def forget_cached_principal(mapper, connection, target):
+    principal_cache.invalidate_user(target.id)
+
+
+# Operational stats are internal only: with STATS_TOKEN set, callers send it as
+# X-Stats-Token; without it, only direct loopback requests (no proxy) are answered
+STATS_TOKEN = os.environ.get("STATS_TOKEN")
+LOOPBACK = ("127.0.0.1", "::1")
+
+
+def require_stats_access(request: Request):
+    if STATS_TOKEN:
+        allowed = secrets.compare_digest(request.headers.get("x-stats-token", ""), STATS_TOKEN)
+    else:
+        proxied = "x-forwarded-for" in request.headers or "forwarded" in request.headers
+        allowed = bool(request.client) and request.client.host in LOOPBACK and not proxied
+    if not allowed:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@app.get("/api/auth/cache-stats", response_model=dict, dependencies=[Depends(require_stats_access)])
+def api_principal_cache_stats():
+    return principal_cache.stats()
 
 
 # ---------------- MEMBERS CRUD ----------------
-@app.get("/api/members", response_model=list[schemas.MemberOut])
+MEMBERS_PAGE_MAX = 200
+CHANGES_PAGE_MAX = 1000
+SSE_HEARTBEAT_SECONDS = 15
+
+
+def _b64encode(value: str) -> str:
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+
+def _b64decode(value: str) -> str:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode()
+
+
+def encode_cursor(member_id: int) -> str:
+    return _b64encode(str(member_id))
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(_b64decode(cursor))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_sync_token(mark, floor: Optional[datetime] = None) -> str:
+    updated_at, member_id = mark
+    value = f"{updated_at.isoformat()}|{member_id}"
+    # The snapshot floor only matters while the token is still below it
+    if floor is not None and floor > updated_at:
+        value += f"|{floor.isoformat()}"
+    return _b64encode(value)
+
+
+def decode_sync_token(token: str):
+    """Returns ((updated_at, id), floor or None)."""
+    try:
+        parts = _b64decode(token).split("|")
+        if len(parts) not in (2, 3):
+            raise ValueError(token)
+        mark = (datetime.fromisoformat(parts[0]), int(parts[1]))
+        return mark, datetime.fromisoformat(parts[2]) if len(parts) == 3 else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+
+
+def members_etag(user_id: int, version: int, cursor: Optional[str], limit: int) -> str:
+    stamp = f"{user_id}:{version}:{cursor or ''}:{limit}"
+    return f'W/"{hashlib.sha1(stamp.encode()).hexdigest()[:20]}"'
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match with the weak comparison RFC 9110 requires (W/ is ignored, * matches)."""
+    if if_none_match.strip() == "*":
+        return True
+    return _opaque_tag(etag) in (_opaque_tag(tag) for tag in if_none_match.split(","))
+
+
+@app.get("/api/members", response_model=schemas.MemberPage)
 def api_list_members(
-    current_user: models.User = Depends(get_current_user_from_header),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MEMBERS_PAGE_MAX),
+    if_none_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_user_from_header),
+    db: Session = Depends(get_db),
+):
+    # Unchanged since the client's copy: answer from the version row alone
+    etag = members_etag(current_user.id, crud.member_list_version(db, current_user.id), cursor, limit)
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=cache_headers)
+
+    before_id = decode_cursor(cursor) if cursor else None
+    # First page also hands out a delta-sync token, taken before the read so nothing slips between
+    sync_token = None if cursor else encode_sync_token(crud.member_sync_mark(db, current_user.id))
+    # One extra row tells us whether there is another page
+    rows = crud.list_members(db, current_user.id, before_id=before_id, limit=limit + 1)
+    items = [dict(zip(crud.MEMBER_FIELDS, row)) for row in rows[:limit]]
+    next_cursor = encode_cursor(items[-1]["id"]) if len(rows) > limit else None
+    # Rows come straight from our own table: skip response_model re-validation
+    return ORJSONResponse(
+        {"items": items, "next_cursor": next_cursor, "sync_token": sync_token},
+        headers=cache_headers,
+    )
+
+
+@app.get("/api/members/changes", response_model=schemas.MemberChanges)
+def api_member_changes(
+    since: Optional[str] = None,
+    client_id: Optional[str] = Query(None, max_length=64),
+    limit: int = Query(200, ge=1, le=CHANGES_PAGE_MAX),
+    current_user: Principal = Depends(get_current_user_from_header),
     db: Session = Depends(get_db),
 ):
-    return crud.list_members(db)
+    if since:
+        mark, floor = decode_sync_token(since)
+        if crud.is_sync_mark_compacted(db, current_user.id, mark, floor):
+            raise HTTPException(status_code=410, detail="Sync token expired; reload the full list")
+    else:
+        # A snapshot holds no rows whose tombstones were compacted before it started
+        mark, floor = None, crud.tombstone_watermark(db, current_user.id)
+    if client_id:
+        crud.record_sync_client(db, client_id, current_user.id, mark[0] if mark else datetime.utcnow())
+
+    rows = crud.list_member_changes(db, current_user.id, since=mark, limit=limit + 1)
+    changes = []
+    for row in rows[:limit]:
+        if row.deleted_at is not None:
+            changes.append({"id": row.id, "deleted": True})
+        else:
+            changes.append({**dict(zip(crud.MEMBER_FIELDS, row)), "deleted": False})
+    has_more = len(rows) > limit
+    if changes:
+        last = rows[len(changes) - 1]
+        mark = (last.updated_at, last.id)
+    if mark is None:
+        mark = crud.member_sync_mark(db, current_user.id)
+    elif not has_more and floor is not None and floor > mark[0]:
+        # Caught up: nothing left between the mark and the floor, so start the next sync at the floor
+        mark, floor = (floor, 0), None
+    return ORJSONResponse({
+        "changes": changes,
+        "next_token": encode_sync_token(mark, floor),
+        "has_more": has_more,
+    })
+
+
+# EventSource can't set headers, so the feed takes the bearer token as ?token=
+def _principal_from_query_token(token: str) -> Principal:
+    db = SessionLocal()
+    try:
+        return resolve_principal(token, db)
+    finally:
+        db.close()
+
+
+@app.get("/api/members/events")
+async def api_member_events(token: str):
+    # Resolve auth on a short-lived session: the stream itself holds no DB connection
+    principal = await run_in_threadpool(_principal_from_query_token, token)
+    subscription = member_events.subscribe(principal.id)
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            # StreamingResponse cancels this generator when the client goes away
+            while True:
+                event = await subscription.next_event(timeout=SSE_HEARTBEAT_SECONDS)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"event: member\ndata: {orjson.dumps(event).decode()}\n\n"
+        finally:
+            member_events.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.post("/api/members", response_model=schemas.MemberOut)
 def api_create_member(
     member: schemas.MemberCreate,
-    current_user: models.User = Depends(get_current_user_from_header),
+    current_user: Principal = Depends(get_current_user_from_header),
     db: Session = Depends(get_db),
 ):
     return crud.create_member(
@@ -113,16 +427,30 @@ def api_create_member(
     )
 
 
+@app.post("/api/members/batch", response_model=schemas.MemberBatchResult)
+def api_batch_members(
+    payload: schemas.MemberBatch,
+    current_user: Principal = Depends(get_current_user_from_header),
+    db: Session = Depends(get_db),
+):
+    try:
+        results = crud.apply_member_batch(db, current_user.id, payload.operations)
+    except SQLAlchemyError:
+        raise HTTPException(status_code=409, detail="Batch rejected; no changes were applied")
+    return {"results": results}
+
+
 @app.put("/api/members/{member_id}", response_model=schemas.MemberOut)
 def api_update_member(
     member_id: int,
     payload: schemas.MemberCreate,
-    current_user: models.User = Depends(get_current_user_from_header),
+    current_user: Principal = Depends(get_current_user_from_header),
     db: Session = Depends(get_db),
 ):
     m = crud.update_member(
         db,
         member_id,
+        current_user.id,
         name=payload.name,
         email=payload.email,
         phone=payload.phone,
@@ -136,10 +464,10 @@ def api_update_member(
 @app.delete("/api/members/{member_id}", response_model=dict)
 def api_delete_member(
     member_id: int,
-    current_user: models.User = Depends(get_current_user_from_header),
+    current_user: Principal = Depends(get_current_user_from_header),
     db: Session = Depends(get_db),
 ):
-    ok = crud.delete_member(db, member_id)
+    ok = crud.delete_member(db, member_id, current_user.id)
     if not ok:
         raise HTTPException(status_code=404, detail="Member not found")
     return {"ok": True}
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+from typing import Optional
+
+# Events a slow subscriber may have pending before it is told to resync
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+RESYNC = {"type": "resync"}
+
+
+class Subscription:
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def _deliver(self, event: dict):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too far behind to catch up with diffs: drop the backlog, ask for a full reload
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def next_event(self, timeout: float) -> Optional[dict]:
+        try:
+            event = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if event is RESYNC:
+            self.overflowed = False
+        return event
+
+
+class MemberEventBroker:
+    """In-process fan-out of member changes to every open feed of the owning user.
+
+    ``publish`` is called from the sync crud functions (threadpool), so events
+    are handed to each subscriber's event loop thread-safely.
+    """
+
+    def __init__(self):
+        self._subscribers = {}  # user id -> set of Subscription
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int) -> Subscription:
+        sub = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            subs = self._subscribers.get(sub.user_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.user_id]
+
+    def publish(self, user_id: int, event: dict):
+        with self._lock:
+            subs = list(self._subscribers.get(user_id, ()))
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub._deliver, event)
+            except RuntimeError:
+                # Loop already closed (server shutting down)
+                self.unsubscribe(sub)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subs) for subs in self._subscribers.values())
+
+
+member_events = MemberEventBroker()
+
+
+def member_dict(m) -> dict:
+    return {"name": m.name, "email": m.email, "phone": m.phone, "organization": m.organization, "id": m.id}
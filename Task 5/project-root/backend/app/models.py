@@ -1,7 +1,12 @@
-from sqlalchemy import Column, Integer, String, DateTime, func, ForeignKey
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, func, ForeignKey, Index
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import relationship
 from .database import Base
 
+# Sync tokens compare these, so keep sub-second precision on MySQL too
+PreciseDateTime = DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql")
+
 
 class User(Base):
     __tablename__ = "users"
@@ -25,7 +30,50 @@ class Member(Base):
     phone = Column(String(50), nullable=True)
     organization = Column(String(255), nullable=True)
     created_at = Column(DateTime, server_default=func.now())
+    # Bumped on every write; deleted rows stay behind as tombstones until compacted
+    updated_at = Column(PreciseDateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    deleted_at = Column(PreciseDateTime, nullable=True)
 
     # Foreign key relationship to users
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     user = relationship("User", back_populates="members")
+
+    # Owner-scoped listing walks (user_id, id) newest-first without a sort;
+    # delta sync walks (user_id, updated_at, id) forward from a token;
+    # compaction finds owners of old tombstones from (deleted_at, user_id) alone
+    __table_args__ = (
+        Index("ix_members_user_id_id", "user_id", "id"),
+        Index("ix_members_user_id_updated_at", "user_id", "updated_at", "id"),
+        Index("ix_members_deleted_at_user_id", "deleted_at", "user_id"),
+    )
+
+
+class MemberSyncClient(Base):
+    """How far each client has synced; tombstones older than every live client's mark can go."""
+    __tablename__ = "member_sync_clients"
+
+    client_id = Column(String(64), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    synced_until = Column(PreciseDateTime, nullable=True)
+    last_seen = Column(PreciseDateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class MemberTombstoneWatermark(Base):
+    """Tombstones before ``compacted_until`` are gone: older sync tokens must resync."""
+    __tablename__ = "member_tombstone_watermarks"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    compacted_until = Column(PreciseDateTime, nullable=False)
+
+
+class MemberListVersion(Base):
+    """Bumped in the same transaction as every change to a user's members.
+
+    ``version`` is the ETag source; ``changed_at`` is the last ``updated_at``
+    handed out, which keeps the owner's stamps increasing in commit order.
+    """
+    __tablename__ = "member_list_versions"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    changed_at = Column(PreciseDateTime, nullable=True)
@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+# Seconds a resolved token stays cached (0 disables the cache), and max tokens kept
+PRINCIPAL_CACHE_TTL = float(os.environ.get("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.environ.get("PRINCIPAL_CACHE_SIZE", "10000"))
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as the API routes see it (no live ORM session attached)."""
+    id: int
+    username: str
+    email: str
+
+
+class PrincipalCache:
+    """TTL-bounded LRU from bearer token to Principal.
+
+    An entry never outlives the token's own ``exp``, and every token of a user
+    is dropped as soon as that user is updated or deleted.
+    """
+
+    def __init__(self, ttl: float = PRINCIPAL_CACHE_TTL, max_size: int = PRINCIPAL_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # token -> (principal, expires_at)
+        self._by_user = {}             # user id -> set of tokens
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_size > 0
+
+    def get(self, token: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                principal, expires_at = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return principal
+                self._drop(token)
+            self.misses += 1
+            return None
+
+    def put(self, token: str, principal: Principal, token_exp: Optional[float] = None):
+        if not self.enabled:
+            return
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        with self._lock:
+            if token in self._entries:
+                self._drop(token)
+            self._entries[token] = (principal, expires_at)
+            self._by_user.setdefault(principal.id, set()).add(token)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            for token in list(self._by_user.get(user_id, ())):
+                self._drop(token)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def _drop(self, token: str):
+        principal, _ = self._entries.pop(token)
+        tokens = self._by_user.get(principal.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[principal.id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache()
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Literal, Optional
 
 class UserCreate(BaseModel):
     username: str
@@ -20,3 +20,39 @@ class MemberOut(MemberCreate):
     id: int
     class Config:
         orm_mode = True
+
+class MemberPage(BaseModel):
+    items: List[MemberOut]
+    next_cursor: Optional[str] = None
+    sync_token: Optional[str] = None
+
+class MemberChange(BaseModel):
+    id: int
+    deleted: bool
+    name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    organization: Optional[str] = None
+
+class MemberChanges(BaseModel):
+    changes: List[MemberChange]
+    next_token: str
+    has_more: bool
+
+class MemberOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[int] = None
+    data: Optional[MemberCreate] = None
+
+class MemberBatch(BaseModel):
+    operations: List[MemberOperation] = Field(..., max_items=10000)
+
+class MemberOperationResult(BaseModel):
+    index: int
+    op: str
+    status: Literal["created", "updated", "deleted", "not_found", "invalid"]
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+class MemberBatchResult(BaseModel):
+    results: List[MemberOperationResult]
@@ -0,0 +1,195 @@
+"""API load benchmark: per-route latency and throughput with a baseline regression check.
+
+Runs the app in-process over httpx against a throwaway SQLite database. For
+each table size, concurrent clients each register, log in, and then loop over
+list / create / update / delete on their own members (the table is seeded to
+the given size, split across the clients):
+
+    python bench_api_load.py --sizes 1000 100000 --clients 20 --rounds 25
+    python bench_api_load.py --save-baseline        # record bench_baseline.json
+    python bench_api_load.py --threshold 0.25       # exit 1 if a route got >25% worse
+
+Routes run interleaved, so throughput is only measured per phase (sign-up, CRUD
+rounds), not per route. A run regresses when a route's p95 latency rises, or a
+phase's requests/sec falls, by more than the threshold relative to the stored
+baseline for the same size. Baselines are machine-specific, so none is
+committed: record one on the machine that runs the check. Without
+--save-baseline, a missing baseline file, or a size, route or phase the
+baseline does not cover, fails the run rather than passing it unchecked.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+os.environ.setdefault("TOMBSTONE_COMPACT_INTERVAL", "0")
+
+import httpx
+from sqlalchemy import delete, insert
+
+from app.database import SessionLocal
+from app.main import app
+from app.models import Member, MemberSyncClient
+
+DEFAULT_BASELINE = Path(__file__).with_name("bench_baseline.json")
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    async def call(self, client, method, route, url, **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.samples[f"{method} {route}"].append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {url} -> {response.status_code}: {response.text}")
+        return response
+
+    def latencies(self):
+        report = {}
+        for route, samples in sorted(self.samples.items()):
+            cuts = statistics.quantiles(samples, n=100) if len(samples) > 1 else samples * 99
+            report[route] = {
+                "count": len(samples),
+                "p50": round(cuts[49], 3),
+                "p95": round(cuts[94], 3),
+                "p99": round(cuts[98], 3),
+            }
+        return report
+
+    def throughput(self, elapsed):
+        count = sum(len(samples) for samples in self.samples.values())
+        return {"count": count, "rps": round(count / elapsed, 1)}
+
+
+def reset_members(user_ids, total):
+    """Replace every member with ``total`` rows spread evenly over ``user_ids``."""
+    db = SessionLocal()
+    db.execute(delete(MemberSyncClient))
+    db.execute(delete(Member))
+    rows = [
+        {"name": f"Member {i}", "email": f"member{i}@example.com", "user_id": user_ids[i % len(user_ids)]}
+        for i in range(total)
+    ]
+    for start in range(0, len(rows), 10_000):
+        db.execute(insert(Member), rows[start:start + 10_000])
+    db.commit()
+    db.close()
+
+
+async def sign_up(client, recorder, name):
+    payload = {"username": name, "email": f"{name}@example.com", "password": "bench-password"}
+    user_id = (await recorder.call(client, "POST", "/api/auth/register", "/api/auth/register", json=payload)).json()["user_id"]
+    login = {"identifier": name, "password": "bench-password"}
+    token = (await recorder.call(client, "POST", "/api/auth/login", "/api/auth/login", json=login)).json()["access_token"]
+    return user_id, {"Authorization": f"Bearer {token}"}
+
+
+async def member_rounds(client, recorder, headers, rounds, tag):
+    for i in range(rounds):
+        await recorder.call(client, "GET", "/api/members", "/api/members?limit=50", headers=headers)
+        member = {"name": f"Load {tag}-{i}", "email": f"load-{tag}-{i}@example.com"}
+        created = await recorder.call(client, "POST", "/api/members", "/api/members", json=member, headers=headers)
+        member_id = created.json()["id"]
+        member["organization"] = "Bench"
+        await recorder.call(client, "PUT", "/api/members/{id}", f"/api/members/{member_id}", json=member, headers=headers)
+        await recorder.call(client, "DELETE", "/api/members/{id}", f"/api/members/{member_id}", headers=headers)
+
+
+async def run_size(client, size, clients, rounds):
+    recorder = Recorder()
+    start = time.perf_counter()
+    accounts = await asyncio.gather(*(sign_up(client, recorder, f"load{size}x{n}") for n in range(clients)))
+    auth_elapsed = time.perf_counter() - start
+
+    reset_members([user_id for user_id, _ in accounts], size)
+
+    crud = Recorder()
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        member_rounds(client, crud, headers, rounds, f"{size}x{n}") for n, (_, headers) in enumerate(accounts)
+    ))
+    crud_elapsed = time.perf_counter() - start
+    return {
+        "routes": {**recorder.latencies(), **crud.latencies()},
+        "phases": {"sign-up": recorder.throughput(auth_elapsed), "crud rounds": crud.throughput(crud_elapsed)},
+    }
+
+
+def print_report(size, report):
+    print(f"\n{size} members")
+    print(f"{'route':<28} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for route, r in report["routes"].items():
+        print(f"{route:<28} {r['count']:>6} {r['p50']:>9.2f} {r['p95']:>9.2f} {r['p99']:>9.2f}")
+    print(f"{'phase':<28} {'count':>6} {'req/s':>9}")
+    for phase, r in report["phases"].items():
+        print(f"{phase:<28} {r['count']:>6} {r['rps']:>9.1f}")
+
+
+def regressions(results, baseline, threshold):
+    found = []
+    for size, report in results.items():
+        before_report = baseline.get(size)
+        if before_report is None:
+            found.append(f"{size}: not in baseline")
+            continue
+        for route, current in report["routes"].items():
+            before = before_report.get("routes", {}).get(route)
+            if before is None:
+                found.append(f"{size} {route}: not in baseline")
+            elif current["p95"] > before["p95"] * (1 + threshold):
+                found.append(f"{size} {route}: p95 {before['p95']:.2f} -> {current['p95']:.2f} ms")
+        for phase, current in report["phases"].items():
+            before = before_report.get("phases", {}).get(phase)
+            if before is None:
+                found.append(f"{size} {phase}: not in baseline")
+            elif current["rps"] < before["rps"] * (1 - threshold):
+                found.append(f"{size} {phase}: req/s {before['rps']:.1f} -> {current['rps']:.1f}")
+    return found
+
+
+async def run(args):
+    if not args.save_baseline and not args.baseline.exists():
+        # Checked before running so a missing baseline cannot pass the gate
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+        return 1
+
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        for size in args.sizes:
+            results[str(size)] = report = await run_size(client, size, args.clients, args.rounds)
+            print_report(size, report)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    found = regressions(results, json.loads(args.baseline.read_text()), args.threshold)
+    if found:
+        print(f"\nRegressions beyond {args.threshold:.0%} (or missing from {args.baseline.name}):")
+        for line in found:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo route regressed beyond {args.threshold:.0%} of {args.baseline.name}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=25, help="CRUD rounds per client")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    sys.exit(asyncio.run(run(parser.parse_args())))
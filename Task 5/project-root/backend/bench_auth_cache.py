@@ -0,0 +1,68 @@
+"""Authenticated request throughput with and without the JWT principal cache.
+
+Runs the app in-process against a throwaway SQLite database and hammers
+GET /api/members with one bearer token from several concurrent clients:
+
+    python bench_auth_cache.py --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import httpx
+
+from app.main import app
+from app.principal_cache import principal_cache
+
+
+async def login(client):
+    await client.post("/api/auth/register", json={
+        "username": "bench", "email": "bench@example.com", "password": "bench-password",
+    })
+    response = await client.post("/api/auth/login", json={"identifier": "bench", "password": "bench-password"})
+    return response.json()["access_token"]
+
+
+async def drive(client, token, total, concurrency):
+    headers = {"Authorization": f"Bearer {token}"}
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            response = await client.get("/api/members", headers=headers)
+            assert response.status_code == 200, response.status_code
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - start)
+
+
+async def run(total, concurrency):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        token = await login(client)
+        ttl = principal_cache.ttl
+
+        principal_cache.ttl = 0
+        principal_cache.clear()
+        uncached = await drive(client, token, total, concurrency)
+
+        principal_cache.ttl = ttl
+        cached = await drive(client, token, total, concurrency)
+
+    print(f"{'mode':>10} {'req/s':>10}")
+    print(f"{'no cache':>10} {uncached:>10.0f}")
+    print(f"{'cache':>10} {cached:>10.0f}  ({cached / uncached:.2f}x)")
+    print(principal_cache.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency))
@@ -0,0 +1,70 @@
+"""Member list serialization microbenchmark: response_model path vs. the orjson fast path.
+
+Serializes the same N members both ways, without HTTP or a database:
+
+  * model:  ORM objects -> schemas.MemberPage (orm_mode) -> jsonable_encoder -> json
+  * fast:   column tuples -> dicts -> orjson (what /api/members now does)
+
+    python bench_member_json.py --rows 10000
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from datetime import datetime
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from app import crud, models, schemas
+from app.main import encode_sync_token
+
+SYNC_TOKEN = encode_sync_token((datetime(2024, 1, 1), 0))
+
+
+def make_rows(count):
+    return [
+        (f"Member {i}", f"member{i}@example.com", f"555-{i:07d}", "Example Org", i)
+        for i in range(count, 0, -1)
+    ]
+
+
+def model_path(rows):
+    members = [models.Member(**dict(zip(crud.MEMBER_FIELDS, row))) for row in rows]
+    page = schemas.MemberPage(items=members, next_cursor=None, sync_token=SYNC_TOKEN)
+    return json.dumps(jsonable_encoder(page), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def fast_path(rows):
+    items = [dict(zip(crud.MEMBER_FIELDS, row)) for row in rows]
+    return orjson.dumps({"items": items, "next_cursor": None, "sync_token": SYNC_TOKEN})
+
+
+def timed(fn, rows, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run(count, repeat):
+    rows = make_rows(count)
+    assert json.loads(model_path(rows)) == json.loads(fast_path(rows)), "outputs differ"
+    model_ms = timed(model_path, rows, repeat)
+    fast_ms = timed(fast_path, rows, repeat)
+    print(f"{count} rows, median of {repeat}")
+    print(f"{'model':>6} {model_ms:>9.2f}ms")
+    print(f"{'fast':>6} {fast_ms:>9.2f}ms  ({model_ms / fast_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
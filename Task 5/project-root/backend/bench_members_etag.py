@@ -0,0 +1,96 @@
+"""/api/members conditional GET: full response vs. 304 from the ETag.
+
+Seeds a throwaway SQLite database, then times repeated first-page requests with
+and without If-None-Match and counts the SQL statements that touch the members
+table on each path (the 304 path must run none):
+
+    python bench_members_etag.py --members 10000 --limit 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import httpx
+from sqlalchemy import event, insert
+
+from app.database import SessionLocal, engine
+from app.main import app
+from app.models import Member
+
+member_queries = 0
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def count_member_queries(conn, cursor, statement, parameters, context, executemany):
+    global member_queries
+    if "members" in statement:
+        member_queries += 1
+
+
+async def login(client):
+    await client.post("/api/auth/register", json={
+        "username": "bench", "email": "bench@example.com", "password": "bench-password",
+    })
+    response = await client.post("/api/auth/login", json={"identifier": "bench", "password": "bench-password"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def seed(count):
+    db = SessionLocal()
+    db.execute(insert(Member), [
+        {"name": f"Member {i}", "email": f"member{i}@example.com", "user_id": 1} for i in range(count)
+    ])
+    db.commit()
+    db.close()
+
+
+async def timed(client, url, headers, expected, repeat):
+    global member_queries
+    member_queries = 0
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = await client.get(url, headers=headers)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == expected, response.status_code
+    return statistics.median(samples), member_queries / repeat
+
+
+async def run(members, limit, repeat):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        auth = await login(client)
+        seed(members)
+        url = f"/api/members?limit={limit}"
+        etag = (await client.get(url, headers=auth)).headers["ETag"]
+
+        full_ms, full_queries = await timed(client, url, auth, 200, repeat)
+        cached_ms, cached_queries = await timed(client, url, {**auth, "If-None-Match": etag}, 304, repeat)
+
+        # Weak comparison: the tag without W/, and *, also match
+        for tag in (etag[2:], "*", f'"other", {etag}'):
+            assert (await client.get(url, headers={**auth, "If-None-Match": tag})).status_code == 304, tag
+
+        # A write must change the ETag
+        await client.post("/api/members", json={"name": "New", "email": "new@example.com"}, headers=auth)
+        changed = await client.get(url, headers={**auth, "If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["ETag"] != etag
+
+    print(f"{'path':>6} {'median':>10} {'member queries/request':>24}")
+    print(f"{'200':>6} {full_ms:>8.2f}ms {full_queries:>24.1f}")
+    print(f"{'304':>6} {cached_ms:>8.2f}ms {cached_queries:>24.1f}")
+    assert cached_queries == 0, "304 path queried the members table"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=10000)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.members, args.limit, args.repeat))
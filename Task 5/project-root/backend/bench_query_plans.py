@@ -0,0 +1,217 @@
+"""Query-plan and scaling checks for the crud.py queries on a large dataset.
+
+Grows a scratch database through each size (users and members), runs every
+crud query against it, captures the SQL it issues, and checks each statement's
+EXPLAIN plan for full table scans. Each query is also timed at every size, and
+the script flags a "cliff" when one gets much slower as the data grows 10x.
+Exits 1 on any full scan or cliff.
+
+    python bench_query_plans.py                            # SQLite, 10k / 100k / 1M
+    python bench_query_plans.py --sizes 10000 100000 1000000 5000000
+    DATABASE_URL=mysql+pymysql://user:pw@localhost/scratch python bench_query_plans.py
+
+Point DATABASE_URL only at a scratch database: the script writes to it.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/plans.db")
+
+from sqlalchemy import event, func, insert, select
+
+from app import crud, models, schemas
+from app.database import Base, SessionLocal, engine
+
+HOT_USER = 1          # owns a tenth of all members: the worst case for per-owner queries
+USER_RATIO = 10       # members per user on average
+TOMBSTONE_EVERY = 50  # every Nth seeded member is soft-deleted
+FIXED_HASH = "$2b$12$" + "x" * 53  # seeding must not pay for bcrypt
+EPOCH = datetime(2024, 1, 1)       # seeded member i was last written at EPOCH + i seconds
+
+
+# ---------------- DATA GENERATOR ----------------
+def grow(size, batch=20_000):
+    """Top the database up to ``size`` members and ``size / USER_RATIO`` users."""
+    db = SessionLocal()
+    users = db.scalar(select(func.count(models.User.id)))
+    target_users = max(size // USER_RATIO, 2)
+    for start in range(users, target_users, batch):
+        db.execute(insert(models.User), [
+            {"username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": FIXED_HASH}
+            for i in range(start, min(start + batch, target_users))
+        ])
+
+    members = db.scalar(select(func.count(models.Member.id)))
+    for start in range(members, size, batch):
+        rows = []
+        for i in range(start, min(start + batch, size)):
+            updated_at = EPOCH + timedelta(seconds=i)
+            rows.append({
+                "name": f"Member {i}",
+                "email": f"member{i}@example.com",
+                "user_id": HOT_USER if i % 10 == 0 else 2 + (i * 7919) % (target_users - 1),
+                "updated_at": updated_at,
+                "deleted_at": updated_at if i % TOMBSTONE_EVERY == 0 else None,
+            })
+        db.execute(insert(models.Member), rows)
+    db.commit()
+    db.close()
+    return target_users
+
+
+# ---------------- CRUD QUERIES UNDER TEST ----------------
+def crud_cases(size, users):
+    """name -> fn(db, i); ``i`` varies per repetition so writes hit different rows."""
+    middle = EPOCH + timedelta(seconds=size // 2)
+
+    def live_id(i, start):
+        """A live member of HOT_USER (ids 10k + 1), skipping seeded tombstones."""
+        k = start + i * 7
+        k += (10 * k) % TOMBSTONE_EVERY == 0
+        return 10 * k + 1
+
+    def batch(db, i):
+        base = size // 4 + i * 20
+        ops = [schemas.MemberOperation(op="update", id=base + n, data={"name": "B", "email": "b@example.com"})
+               for n in range(5)]
+        ops += [schemas.MemberOperation(op="delete", id=base + 10 + n) for n in range(5)]
+        crud.apply_member_batch(db, HOT_USER, ops)
+
+    return {
+        "get_user_by_username": lambda db, i: crud.get_user_by_username(db, f"user{(users // 2 + i) % users}"),
+        "get_user_by_email": lambda db, i: crud.get_user_by_email(db, f"user{(users // 2 + i) % users}@example.com"),
+        "member_list_version": lambda db, i: crud.member_list_version(db, HOT_USER),
+        "list_members (first page)": lambda db, i: crud.list_members(db, HOT_USER, limit=51),
+        "list_members (cursor)": lambda db, i: crud.list_members(db, HOT_USER, before_id=size // 2, limit=51),
+        "member_sync_mark": lambda db, i: crud.member_sync_mark(db, HOT_USER),
+        "is_sync_mark_compacted": lambda db, i: crud.is_sync_mark_compacted(db, HOT_USER, (middle, 0)),
+        "list_member_changes (snapshot)": lambda db, i: crud.list_member_changes(db, HOT_USER, limit=201),
+        "list_member_changes (since)": lambda db, i: crud.list_member_changes(db, HOT_USER, (middle, 0), limit=201),
+        "update_member": lambda db, i: crud.update_member(db, live_id(i, size // 30), HOT_USER, name=f"Renamed {i}"),
+        "delete_member": lambda db, i: crud.delete_member(db, live_id(i, size // 15), HOT_USER),
+        "apply_member_batch": batch,
+        "record_sync_client": lambda db, i: crud.record_sync_client(db, f"client-{i % 50}", HOT_USER, middle),
+        "compact_member_tombstones (idle)": lambda db, i: crud.compact_member_tombstones(db, timedelta(days=9999), timedelta(days=9999)),
+        # Expires the first 1% of seeded rows' tombstones on the first call, then runs idle
+        "compact_member_tombstones (expiring)": lambda db, i: crud.compact_member_tombstones(
+            db, datetime.utcnow() - (EPOCH + timedelta(seconds=size // 100)), timedelta(days=9999)),
+    }
+
+
+# ---------------- PLAN CHECKS ----------------
+class StatementCapture:
+    def __init__(self):
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        if verb in ("SELECT", "UPDATE", "DELETE"):
+            params = parameters[0] if executemany else parameters
+            self.statements.append((statement, params))
+
+
+def full_scans(statement, params):
+    """Plan steps that read a whole table or index instead of seeking into it."""
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, params).all()
+            # SEARCH seeks into an index; SCAN walks a whole table or index
+            return [row[3] for row in plan if row[3].startswith("SCAN ") and "CONSTANT ROW" not in row[3]]
+        if engine.dialect.name == "mysql":
+            plan = conn.exec_driver_sql("EXPLAIN " + statement, params).mappings().all()
+            return [f"{row['table']} (type={row['type']})" for row in plan if row["type"] in ("ALL", "index")]
+    return []
+
+
+def check_plans(cases):
+    problems = []
+    db = SessionLocal()
+    for name, fn in cases.items():
+        with StatementCapture() as capture:
+            fn(db, 0)
+        seen = set()
+        for statement, params in capture.statements:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            for scan in full_scans(statement, params):
+                problems.append(f"{name}: full scan {scan}\n    {' '.join(statement.split())}")
+    db.close()
+    return problems
+
+
+# ---------------- TIMINGS ----------------
+def time_cases(cases, repeat):
+    timings = {}
+    db = SessionLocal()
+    for name, fn in cases.items():
+        samples = []
+        for i in range(1, repeat + 1):
+            start = time.perf_counter()
+            fn(db, i)
+            samples.append((time.perf_counter() - start) * 1000)
+        timings[name] = statistics.median(samples)
+    db.close()
+    return timings
+
+
+def find_cliffs(sizes, timings, ratio, floor_ms):
+    """Queries whose time grew more than ``ratio`` between consecutive sizes."""
+    cliffs = []
+    for small, large in zip(sizes, sizes[1:]):
+        for name, before in timings[small].items():
+            after = timings[large][name]
+            if after > floor_ms and after > max(before, floor_ms / ratio) * ratio:
+                cliffs.append(f"{name}: {before:.2f}ms at {small} -> {after:.2f}ms at {large}")
+    return cliffs
+
+
+def main(args):
+    Base.metadata.create_all(bind=engine)
+    sizes = sorted(args.sizes)
+    timings, problems = {}, []
+    for size in sizes:
+        start = time.perf_counter()
+        users = grow(size)
+        print(f"\nSeeded {size} members / {users} users in {time.perf_counter() - start:.1f}s ({engine.dialect.name})")
+        cases = crud_cases(size, users)
+        problems += [f"[{size}] {p}" for p in check_plans(cases)]
+        timings[size] = time_cases(cases, args.repeat)
+        for name, ms in timings[size].items():
+            print(f"  {name:<34} {ms:>9.3f} ms")
+
+    print(f"\n{'query':<34}" + "".join(f"{size:>12}" for size in sizes))
+    for name in timings[sizes[0]]:
+        print(f"{name:<34}" + "".join(f"{timings[size][name]:>10.3f}ms" for size in sizes))
+
+    cliffs = find_cliffs(sizes, timings, args.cliff_ratio, args.floor_ms)
+    for title, lines in (("Full scans", problems), ("Scaling cliffs", cliffs)):
+        if lines:
+            print(f"\n{title}:")
+            for line in lines:
+                print(f"  {line}")
+    if problems or cliffs:
+        return 1
+    print("\nAll crud queries are index-backed and scale flat")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--cliff-ratio", type=float, default=4.0, help="max slowdown per size step")
+    parser.add_argument("--floor-ms", type=float, default=1.0, help="ignore queries faster than this")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,113 @@
+"""Read/write routing check: replica reads, primary writes, read-your-writes stickiness.
+
+Uses two SQLite files as primary and replica. The replica is a copy of the
+primary taken after seeding, with its member names rewritten, so every list
+response shows which database served it. The script asserts the routing and
+prints per-phase latency:
+
+    python bench_read_routing.py --members 5000
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+workdir = tempfile.mkdtemp()
+PRIMARY = os.path.join(workdir, "primary.db")
+REPLICA = os.path.join(workdir, "replica.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{PRIMARY}"
+os.environ["DATABASE_REPLICA_URLS"] = f"sqlite:///{REPLICA}"
+os.environ.setdefault("READ_YOUR_WRITES_SECONDS", "1")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app.database import READ_YOUR_WRITES_HEADER, READ_YOUR_WRITES_SECONDS, SessionLocal, recent_writers
+from app.main import app
+from app.models import Member
+
+client = TestClient(app)
+
+
+def sign_up(name):
+    client.post("/api/auth/register", json={"username": name, "email": f"{name}@example.com", "password": "pw"})
+    # Login right after register must not miss the user on the (stale) replica
+    response = client.post("/api/auth/login", json={"identifier": name, "password": "pw"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def seed(user_id, count):
+    db = SessionLocal()
+    db.execute(insert(Member), [
+        {"name": f"Member {i}", "email": f"member{i}@example.com", "user_id": user_id} for i in range(count)
+    ])
+    db.commit()
+    db.close()
+
+
+def snapshot_replica():
+    """Copy the primary to the replica and tag its rows so reads reveal their source."""
+    shutil.copyfile(PRIMARY, REPLICA)
+    with sqlite3.connect(REPLICA) as conn:
+        conn.execute("UPDATE members SET name = 'replica:' || name")
+
+
+def list_source(headers, repeat=20):
+    samples, sources = [], set()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get("/api/members?limit=50", headers=headers)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.text
+        items = response.json()["items"]
+        sources.add("replica" if items and items[0]["name"].startswith("replica:") else "primary")
+    assert len(sources) == 1, sources
+    return sources.pop(), statistics.median(samples)
+
+
+def run(members):
+    alice, bob = sign_up("alice"), sign_up("bob")
+    seed(1, members)
+    seed(2, members)
+    snapshot_replica()
+
+    phases = []
+    phases.append(("alice, no recent writes", *list_source(alice), "replica"))
+
+    # Delta sync records the client's position on the primary; that must not pin alice
+    response = client.get("/api/members/changes?client_id=bench-tab", headers=alice)
+    assert response.status_code == 200, response.text
+    phases.append(("alice, after a delta sync", *list_source(alice), "replica"))
+
+    response = client.post("/api/members", json={"name": "Fresh", "email": "fresh@example.com"}, headers=alice)
+    assert response.status_code == 200, response.text
+    phases.append(("alice, just wrote", *list_source(alice), "primary"))
+    phases.append(("bob, while alice is sticky", *list_source(bob), "replica"))
+
+    # Another worker never saw alice's write: only the header she was sent keeps her on the primary
+    response = client.post("/api/members", json={"name": "Other", "email": "other@example.com"}, headers=alice)
+    assert response.status_code == 200, response.text
+    pinned = {**alice, READ_YOUR_WRITES_HEADER: response.headers[READ_YOUR_WRITES_HEADER]}
+    recent_writers._until.clear()
+    phases.append(("alice, other worker + header", *list_source(pinned), "primary"))
+    phases.append(("alice, other worker, no header", *list_source(alice), "replica"))
+
+    time.sleep(READ_YOUR_WRITES_SECONDS + 0.1)
+    phases.append(("alice, after the window", *list_source(pinned), "replica"))
+
+    print(f"{'phase':<30} {'served by':>10} {'median':>10}")
+    for phase, source, ms, expected in phases:
+        print(f"{phase:<30} {source:>10} {ms:>8.2f}ms")
+        assert source == expected, f"{phase}: expected {expected}, got {source}"
+    print("Routing OK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=5000)
+    args = parser.parse_args()
+    run(args.members)
@@ -1,11 +1,19 @@
 const API_BASE = import.meta.env.VITE_API_BASE || "http://127.0.0.1:8000/api";
 
+// After a write the API says how long our reads must stay on the primary; echo it back
+// so whichever server worker handles the next request skips the (possibly lagging) replicas
+const READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes-Until";
+
 async function request(path, options = {}) {
   const headers = options.headers || {};
   const token = localStorage.getItem("access_token");
   if (token) headers["Authorization"] = `Bearer ${token}`;
   headers["Content-Type"] = headers["Content-Type"] || "application/json";
+  const pinnedUntil = sessionStorage.getItem("read_your_writes_until");
+  if (pinnedUntil && Number(pinnedUntil) * 1000 > Date.now()) headers[READ_YOUR_WRITES_HEADER] = pinnedUntil;
   const res = await fetch(`${API_BASE}${path}`, { ...options, headers });
+  const until = res.headers.get(READ_YOUR_WRITES_HEADER);
+  if (until) sessionStorage.setItem("read_your_writes_until", until);
   const text = await res.text();
   let data = null;
   try { data = text ? JSON.parse(text) : null } catch(e){ data = text; }
@@ -18,14 +26,23 @@ async function request(path, options = {}) {
   return data;
 }
 
+// The members list cache (see MembersManagement) belongs to one account: drop it on login/logout
+export function clearAccountCache() {
+  sessionStorage.removeItem("members_sync");
+  sessionStorage.removeItem("members_client_id");
+  sessionStorage.removeItem("read_your_writes_until");
+}
+
 export async function register(payload) {
   return request("/auth/register", { method: "POST", body: JSON.stringify(payload) });
 }
 export async function login(payload) {
   return request("/auth/login", { method: "POST", body: JSON.stringify(payload) });
 }
-export async function getMembers() {
-  return request("/members", { method: "GET" });
+export async function getMembers(cursor = null, limit = 50) {
+  const params = new URLSearchParams({ limit });
+  if (cursor) params.set("cursor", cursor);
+  return request(`/members?${params}`, { method: "GET" });
 }
 export async function addMember(member) {
   return request("/members", { method: "POST", body: JSON.stringify(member) });
@@ -36,3 +53,26 @@ export async function updateMember(id, member) {
 export async function deleteMember(id) {
   return request(`/members/${id}`, { method: "DELETE" });
 }
+// operations: [{ op: "create" | "update" | "delete", id?, data? }], applied in one transaction
+export async function batchMembers(operations) {
+  return request("/members/batch", { method: "POST", body: JSON.stringify({ operations }) });
+}
+// Live member changes: onEvent({ type: "created" | "updated" | "deleted" | "resync", member?, id? }).
+// onReconnect runs when the stream comes back after dropping (events may have been missed).
+export function subscribeMembers(onEvent, onReconnect = () => {}) {
+  const token = localStorage.getItem("access_token");
+  const source = new EventSource(`${API_BASE}/members/events?token=${encodeURIComponent(token || "")}`);
+  let dropped = false;
+  source.addEventListener("member", (e) => onEvent(JSON.parse(e.data)));
+  source.addEventListener("error", () => { dropped = true; });
+  source.addEventListener("open", () => {
+    if (dropped) onReconnect();
+    dropped = false;
+  });
+  return () => source.close();
+}
+// Members changed since a sync token; throws with status 410 when the token is too old
+export async function getMemberChanges(since, clientId) {
+  const params = new URLSearchParams({ since, client_id: clientId });
+  return request(`/members/changes?${params}`, { method: "GET" });
+}
@@ -1,6 +1,6 @@
 import React, { useState } from "react";
 import { useNavigate } from "react-router-dom";
-import { login } from "../api";
+import { login, clearAccountCache } from "../api";
 
 export default function Login() {
   const [identifier, setIdentifier] = useState("");
@@ -13,6 +13,7 @@ export default function Login() {
     setErr(null);
     try {
       const data = await login({ identifier, password });
+      clearAccountCache();
       localStorage.setItem("access_token", data.access_token);
       nav("/welcome");
     } catch (e) {
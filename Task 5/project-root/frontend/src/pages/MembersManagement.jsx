@@ -1,8 +1,40 @@
-import React, { useEffect, useState } from "react";
-import { getMembers, addMember, updateMember, deleteMember } from "../api";
+import React, { useEffect, useRef, useState } from "react";
+import {
+  getMembers,
+  getMemberChanges,
+  addMember,
+  updateMember,
+  deleteMember,
+  subscribeMembers,
+} from "../api";
+
+// Loaded list + sync token survive a refresh of this tab, so it only fetches what changed
+const SYNC_KEY = "members_sync";
+
+function readSyncState() {
+  try {
+    return JSON.parse(sessionStorage.getItem(SYNC_KEY));
+  } catch (e) {
+    return null;
+  }
+}
+
+function syncClientId() {
+  let id = sessionStorage.getItem("members_client_id");
+  if (!id) {
+    id = crypto.randomUUID();
+    sessionStorage.setItem("members_client_id", id);
+  }
+  return id;
+}
 
 export default function MembersManagement() {
-  const [members, setMembers] = useState([]);
+  const [saved] = useState(readSyncState);
+  const [members, setMembers] = useState(saved?.members || []);
+  const [nextCursor, setNextCursor] = useState(saved?.nextCursor || null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const sentinel = useRef(null);
+  const syncToken = useRef(saved?.token || null);
   const [editing, setEditing] = useState(null);
   const [form, setForm] = useState({
     name: "",
@@ -12,30 +44,99 @@ export default function MembersManagement() {
   });
   const [err, setErr] = useState(null);
 
+  // First page; called again only when the change feed or delta sync asks for a resync
   async function load() {
     try {
-      const data = await getMembers();
-      setMembers(data);
+      const page = await getMembers();
+      syncToken.current = page.sync_token;
+      setMembers(page.items);
+      setNextCursor(page.next_cursor);
     } catch (e) {
       setErr(e.data?.detail || e.message);
     }
   }
 
+  async function loadMore() {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await getMembers(nextCursor);
+      setMembers((prev) => [...prev, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (e) {
+      setErr(e.data?.detail || e.message);
+    } finally {
+      setLoadingMore(false);
+    }
+  }
+
+  // Merge one change into the loaded list; safe to apply the same change twice
+  function applyChange(change) {
+    if (change.type === "resync") {
+      load();
+    } else if (change.type === "deleted") {
+      setMembers((prev) => prev.filter((m) => m.id !== change.id));
+    } else {
+      const member = change.member;
+      // Unknown members newer than the top row are new; older ones show up when scrolled to
+      setMembers((prev) =>
+        prev.some((m) => m.id === member.id)
+          ? prev.map((m) => (m.id === member.id ? member : m))
+          : !prev.length || member.id > prev[0].id
+          ? [member, ...prev]
+          : prev
+      );
+    }
+  }
+
+  // Pull everything that changed since our sync token
+  async function catchUp() {
+    if (!syncToken.current) return load();
+    try {
+      let page;
+      do {
+        page = await getMemberChanges(syncToken.current, syncClientId());
+        for (const { deleted, ...member } of page.changes) {
+          applyChange(deleted ? { type: "deleted", id: member.id } : { type: "updated", member });
+        }
+        syncToken.current = page.next_token;
+      } while (page.has_more);
+    } catch (e) {
+      if (e.status === 410) load();
+      else setErr(e.data?.detail || e.message);
+    }
+  }
+
   useEffect(() => {
-    load();
+    if (saved) catchUp();
+    else load();
+    return subscribeMembers(applyChange, catchUp);
   }, []);
 
+  useEffect(() => {
+    sessionStorage.setItem(SYNC_KEY, JSON.stringify({ members, nextCursor, token: syncToken.current }));
+  }, [members, nextCursor]);
+
+  // Fetch the next page when the bottom of the table scrolls into view
+  useEffect(() => {
+    if (!sentinel.current || !nextCursor) return;
+    const observer = new IntersectionObserver((entries) => {
+      if (entries[0].isIntersecting) loadMore();
+    });
+    observer.observe(sentinel.current);
+    return () => observer.disconnect();
+  }, [nextCursor, loadingMore]);
+
   async function submit(e) {
     e.preventDefault();
     try {
       if (editing) {
-        await updateMember(editing.id, form);
+        applyChange({ type: "updated", member: await updateMember(editing.id, form) });
         setEditing(null);
       } else {
-        await addMember(form);
+        applyChange({ type: "created", member: await addMember(form) });
       }
       setForm({ name: "", email: "", phone: "", organization: "" });
-      load();
     } catch (e) {
       setErr(e.data?.detail || e.message);
     }
@@ -54,7 +155,7 @@ export default function MembersManagement() {
   async function doDelete(id) {
     if (!confirm("Delete member?")) return;
     await deleteMember(id);
-    load();
+    applyChange({ type: "deleted", id });
   }
 
   return (
@@ -179,6 +280,9 @@ export default function MembersManagement() {
               )}
             </tbody>
           </table>
+          <div ref={sentinel} className="py-2 text-center text-sm text-gray-500">
+            {loadingMore ? "Loading more..." : nextCursor ? "" : members.length > 0 && "End of list"}
+          </div>
         </div>
       </div>
     </div>
@@ -1,10 +1,12 @@
 import React from "react";
 import { Link, useNavigate } from "react-router-dom";
+import { clearAccountCache } from "../api";
 
 export default function Welcome() {
   const nav = useNavigate();
   function logout() {
     localStorage.removeItem("access_token");
+    clearAccountCache();
     nav("/login");
   }
   return (
@@ -0,0 +1,85 @@
+"""Login-storm benchmark: p99 latency of /welcome while many logins hash passwords.
+
+Runs the app in-process against a throwaway SQLite database:
+
+    python bench_login_storm.py                  # bcrypt in the process pool
+    PASSWORD_HASH_WORKERS=0 python bench_login_storm.py   # bcrypt on the event loop
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+# This benchmark is about bcrypt scheduling, so keep the login throttle out of the way
+for name in ("LOGIN_IP_RATE", "LOGIN_IP_BURST", "LOGIN_USER_RATE", "LOGIN_USER_BURST", "LOGIN_IP_CONCURRENCY"):
+    os.environ.setdefault(name, "1000000")
+
+import httpx
+
+from database import SessionLocal
+from hashing import _hash, hasher
+from main import app
+from models import User
+from schema import ensure_schema
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+async def storm(client, logins):
+    for _ in range(logins):
+        await client.post("/login", data={"username": "bench", "password": "wrong-password"})
+
+
+async def probe(client, stop, samples, interval=0.01):
+    # Latency is measured from when the request *should* have been sent, so time
+    # spent waiting for a blocked event loop counts against /welcome.
+    while not stop.is_set():
+        due = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        await client.get("/welcome")
+        samples.append((time.perf_counter() - due) * 1000)
+
+
+async def run(attackers, logins):
+    ensure_schema()
+    db = SessionLocal()
+    if not db.query(User).filter(User.username == "bench").first():
+        db.add(User(username="bench", email="bench@example.com", password=_hash("bench-password")))
+        db.commit()
+    db.close()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/login", data={"username": "bench", "password": "bench-password"})
+
+        samples = []
+        stop = asyncio.Event()
+        prober = asyncio.create_task(probe(client, stop, samples))
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as attacker:
+            start = time.perf_counter()
+            await asyncio.gather(*(storm(attacker, logins) for _ in range(attackers)))
+            elapsed = time.perf_counter() - start
+        stop.set()
+        await prober
+
+    print(f"hash workers     : {hasher.max_workers}")
+    print(f"logins           : {attackers * logins} in {elapsed:.2f}s")
+    print(f"/welcome samples : {len(samples)}")
+    print(f"/welcome p50     : {statistics.median(samples):.1f} ms")
+    print(f"/welcome p99     : {percentile(samples, 99):.1f} ms")
+    print(f"hasher stats     : {hasher.stats()}")
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--attackers", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=5, help="logins per attacker")
+    args = parser.parse_args()
+    asyncio.run(run(args.attackers, args.logins))
@@ -0,0 +1,106 @@
+"""Credential-stuffing load test: legitimate login latency while an attacker hammers /login.
+
+Attackers send wrong passwords for existing accounts from one IP, so every
+attempt that gets through costs a bcrypt verify; a real user logs in from
+another IP now and then. Both come through the same reverse proxy, which
+reports the client in X-Forwarded-For. The legitimate logins are first timed
+without an attack; the run fails unless every login during the attack stays
+within --max-ratio of that baseline. Runs in-process against SQLite:
+
+    python bench_login_throttle.py
+    LOGIN_IP_RATE=1000000 LOGIN_IP_BURST=1000000 LOGIN_USER_RATE=1000000 \\
+        LOGIN_USER_BURST=1000000 python bench_login_throttle.py   # throttle effectively off
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+PROXY = "10.0.0.1"
+os.environ.setdefault("TRUSTED_PROXIES", PROXY)
+
+import httpx
+
+from database import SessionLocal
+from hashing import _hash, hasher
+from main import app
+from models import User
+from schema import ensure_schema
+from throttle import login_throttle
+
+
+async def attack(client, stop, counter, victims):
+    while not stop.is_set():
+        counter[0] += 1
+        await client.post("/login", data={"username": f"victim{counter[0] % victims}", "password": "hunter2"})
+        await asyncio.sleep(0.005)
+
+
+async def legit_logins(client, logins, interval, username="alice"):
+    samples = []
+    for _ in range(logins):
+        await asyncio.sleep(interval)
+        start = time.perf_counter()
+        response = await client.post("/login", data={"username": username, "password": f"{username}-password"})
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 303, response.status_code
+    return samples
+
+
+def through_proxy(client_ip):
+    """A client whose requests reach the app via the trusted proxy."""
+    transport = httpx.ASGITransport(app=app, client=(PROXY, 4444))
+    return httpx.AsyncClient(transport=transport, base_url="http://bench", headers={"X-Forwarded-For": client_ip})
+
+
+async def run(attackers, victims, logins, interval, max_ratio):
+    ensure_schema()
+    db = SessionLocal()
+    for name in ("alice", "carol"):
+        db.add(User(username=name, email=f"{name}@example.com", password=_hash(f"{name}-password")))
+    victim_hash = _hash("victim-password")
+    for i in range(victims):
+        db.add(User(username=f"victim{i}", email=f"victim{i}@example.com", password=victim_hash))
+    db.commit()
+    db.close()
+
+    counter = [0]
+    stop = asyncio.Event()
+    async with through_proxy("203.0.113.7") as attacker, through_proxy("198.51.100.20") as user:
+        # Uncontended baseline from another account, so alice's username bucket stays full
+        # (the first login also warms up the hashing pool)
+        baseline = statistics.median((await legit_logins(user, 3, 0, username="carol"))[1:])
+        attack_tasks = [asyncio.create_task(attack(attacker, stop, counter, victims)) for _ in range(attackers)]
+        samples = await legit_logins(user, logins, interval)
+        stop.set()
+        await asyncio.gather(*attack_tasks)
+
+    print(f"attack attempts      : {counter[0]}")
+    print(f"throttle             : {login_throttle.stats()}")
+    print(f"bcrypt verifies      : {hasher.stats()['completed']}")
+    print(f"legit login p50      : {statistics.median(samples):.1f} ms")
+    print(f"legit login max      : {max(samples):.1f} ms")
+    print(f"uncontended baseline : {baseline:.1f} ms")
+    hasher.shutdown()
+    bound = baseline * max_ratio
+    if max(samples) > bound:
+        print(f"FAIL: a legitimate login took {max(samples):.1f} ms, over {max_ratio}x the baseline ({bound:.1f} ms)")
+        return 1
+    print(f"OK: every legitimate login stayed within {max_ratio}x the baseline ({bound:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--attackers", type=int, default=16)
+    parser.add_argument("--victims", type=int, default=50, help="existing accounts under attack")
+    parser.add_argument("--logins", type=int, default=5, help="legitimate logins to time")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between legitimate logins")
+    parser.add_argument("--max-ratio", type=float, default=4.0,
+                        help="fail if a legitimate login under attack is slower than this times the baseline")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.attackers, args.victims, args.logins, args.interval, args.max_ratio)))
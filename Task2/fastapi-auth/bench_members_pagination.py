@@ -0,0 +1,73 @@
+"""Members pagination benchmark: /members response time as the table grows.
+
+Seeds a throwaway SQLite database up to each size and times the first page and a
+page deep in the table (keyset cursor near the end):
+
+    python bench_members_pagination.py --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import httpx
+from sqlalchemy import func, insert, select
+
+from database import SessionLocal
+from hashing import _hash, hasher
+from main import app
+from models import Member, User
+from schema import ensure_schema
+
+
+def seed(total):
+    ensure_schema()
+    db = SessionLocal()
+    if not db.query(User).filter(User.username == "bench").first():
+        db.add(User(username="bench", email="bench@example.com", password=_hash("bench-password")))
+    start = db.scalar(select(func.count(Member.id)))
+    batch = 10_000
+    for offset in range(start, total, batch):
+        db.execute(insert(Member), [
+            {"name": f"Member {i}", "email": f"member{i}@example.com", "role": "dev"}
+            for i in range(offset, min(offset + batch, total))
+        ])
+    db.commit()
+    last_id = db.scalar(select(func.max(Member.id)))
+    db.close()
+    return last_id
+
+
+async def timed(client, url, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = await client.get(url)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.status_code
+    return statistics.median(samples)
+
+
+async def run(sizes, repeat):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'members':>10} {'first page':>12} {'deep page':>12}")
+        for size in sorted(sizes):
+            last_id = seed(size)
+            await client.post("/login", data={"username": "bench", "password": "bench-password"})
+            first = await timed(client, "/members", repeat)
+            deep = await timed(client, f"/members?after={last_id - 50}", repeat)
+            print(f"{size:>10} {first:>10.2f}ms {deep:>10.2f}ms")
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.repeat))
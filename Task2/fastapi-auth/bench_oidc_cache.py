@@ -0,0 +1,143 @@
+"""OIDC metadata cache check against a stand-in provider (no network).
+
+Serves a fake discovery document and JWKS through httpx.MockTransport and
+asserts how OIDCMetadataCache behaves:
+
+  * a cold get fetches discovery + JWKS once, later gets are served from memory
+  * a new instance (restarted worker) starts from the disk copy without fetching
+  * transient provider errors are retried with backoff
+  * when the provider stays down, the stale copy is served and the retry is
+    held off for OIDC_RETRY_AFTER instead of hitting the provider every request
+
+It also times a cold fetch against a cached get:
+
+    python bench_oidc_cache.py --latency-ms 50
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from oidc import OIDCMetadataCache
+
+# The failure scenarios below are expected: keep their retry warnings out of the output
+logging.getLogger("oidc").setLevel(logging.ERROR)
+
+DISCOVERY_URL = "https://idp.example/.well-known/openid-configuration"
+DISCOVERY = {
+    "issuer": "https://idp.example",
+    "authorization_endpoint": "https://idp.example/auth",
+    "token_endpoint": "https://idp.example/token",
+    "jwks_uri": "https://idp.example/jwks",
+}
+JWKS = {"keys": [{"kid": "bench", "kty": "RSA", "n": "AQAB", "e": "AQAB"}]}
+
+
+class StandInProvider:
+    """Discovery + JWKS endpoints that count requests and can be told to fail."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.requests = 0
+        self.failures_left = 0
+
+    async def handle(self, request):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        if self.failures_left:
+            self.failures_left -= 1
+            return httpx.Response(503)
+        if request.url.path == "/.well-known/openid-configuration":
+            return httpx.Response(200, json=DISCOVERY)
+        if request.url.path == "/jwks":
+            return httpx.Response(200, json=JWKS)
+        return httpx.Response(404)
+
+
+class FakeClient:
+    """Stands in for an authlib client: only ``server_metadata`` is used."""
+
+    def __init__(self):
+        self.server_metadata = {}
+
+
+def new_cache(provider, cache_path):
+    transport = httpx.MockTransport(provider.handle)
+    return OIDCMetadataCache(DISCOVERY_URL, cache_path=cache_path, transport=transport, backoff=0.01)
+
+
+async def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def run(latency_ms, repeat):
+    provider = StandInProvider(latency_ms / 1000)
+    cache_path = os.path.join(tempfile.mkdtemp(), "oidc_cache.json")
+    cache = new_cache(provider, cache_path)
+
+    # Cold fetch: discovery + JWKS, handed to the client, written to disk
+    client = FakeClient()
+    start = time.perf_counter()
+    await cache.apply(client)
+    cold_ms = (time.perf_counter() - start) * 1000
+    assert provider.requests == 2, provider.requests
+    assert client.server_metadata["jwks"] == JWKS and "_loaded_at" in client.server_metadata
+    assert os.path.exists(cache_path)
+
+    # Warm: served from memory
+    cached_ms = await timed(cache.get, repeat)
+    assert provider.requests == 2, "cached get went to the provider"
+
+    # Restarted worker: loads the disk copy, no fetch
+    restarted = new_cache(provider, cache_path)
+    assert (await restarted.get())["issuer"] == DISCOVERY["issuer"]
+    assert provider.requests == 2, "disk copy was not used"
+
+    # Expired, provider flaky: two 503s, then the retry succeeds
+    cache.fetched_at = 0
+    provider.failures_left = 2
+    before = provider.requests
+    assert (await cache.get())["jwks"] == JWKS
+    assert provider.requests == before + 4, provider.requests - before  # 2 failed + discovery + JWKS
+    assert cache.is_fresh()
+
+    # Expired, provider down: stale copy served, then no new attempts until retry_at
+    cache.fetched_at = 0
+    provider.failures_left = 10_000
+    before = provider.requests
+    assert (await cache.get())["issuer"] == DISCOVERY["issuer"]
+    assert provider.requests == before + cache.retries
+    assert cache.retry_at > time.time()
+    await cache.get()
+    assert provider.requests == before + cache.retries, "stale copy did not hold off retries"
+
+    # Nothing cached anywhere and provider down: the error surfaces
+    empty = new_cache(provider, os.path.join(tempfile.mkdtemp(), "missing.json"))
+    try:
+        await empty.get()
+    except httpx.HTTPError:
+        pass
+    else:
+        raise AssertionError("expected an error with no cached copy")
+
+    print(f"cold fetch  {cold_ms:>9.2f}ms  (provider latency {latency_ms}ms per request)")
+    print(f"cached get  {cached_ms:>9.4f}ms  (median of {repeat})")
+    print("OIDC cache OK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args.latency_ms, args.repeat))
@@ -0,0 +1,65 @@
+"""Session benchmark: per-request overhead of cookie vs server-side sessions.
+
+Each request reads the session and every tenth one writes to it, which is
+roughly what the app's pages do:
+
+    python bench_sessions.py --requests 5000
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+import httpx
+from starlette.applications import Starlette
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from sessions import MemorySessionStore, SQLiteSessionStore, ServerSessionMiddleware
+
+
+async def page(request):
+    if "user" not in request.session or request.query_params.get("write"):
+        request.session.update({
+            "user": "bench",
+            "email": "bench@example.com",
+            "picture": "https://lh3.googleusercontent.com/a/" + "x" * 80,
+        })
+    return PlainTextResponse(request.session["user"])
+
+
+def build(middleware, **options):
+    app = Starlette(routes=[Route("/", page)])
+    app.add_middleware(middleware, **options)
+    return app
+
+
+async def measure(app, requests):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await client.get("/")
+        start = time.perf_counter()
+        for i in range(requests):
+            await client.get("/?write=1" if i % 10 == 0 else "/")
+        elapsed = time.perf_counter() - start
+        cookie_bytes = sum(len(name) + len(value) for name, value in client.cookies.items())
+    return elapsed / requests * 1_000_000, cookie_bytes
+
+
+async def run(requests):
+    variants = {
+        "cookie (SessionMiddleware)": build(SessionMiddleware, secret_key="bench-secret"),
+        "server-side memory": build(ServerSessionMiddleware, store=MemorySessionStore()),
+        "server-side sqlite": build(ServerSessionMiddleware, store=SQLiteSessionStore(f"{tempfile.mkdtemp()}/sessions.db")),
+    }
+    print(f"{'backend':<28} {'us/request':>12} {'cookie bytes':>14}")
+    for name, app in variants.items():
+        per_request, cookie_bytes = await measure(app, requests)
+        print(f"{name:<28} {per_request:>12.1f} {cookie_bytes:>14}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
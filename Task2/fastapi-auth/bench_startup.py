@@ -0,0 +1,58 @@
+"""Cold-start benchmark: time from process start to the first response.
+
+Each run is a fresh interpreter that imports main, runs the startup events and
+serves GET /login. Compares always running create_all against the stored
+schema-version check, both on the same SQLite file:
+
+    python bench_startup.py --runs 5
+    DATABASE_URL=mysql+pymysql://... python bench_startup.py
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CHILD = """
+import time
+start = time.perf_counter()
+from fastapi.testclient import TestClient
+from main import app
+imported = time.perf_counter()
+with TestClient(app) as client:
+    assert client.get("/login").status_code == 200
+    done = time.perf_counter()
+print(f"{(imported - start) * 1000:.1f} {(done - start) * 1000:.1f}")
+"""
+
+
+def run_once(mode):
+    env = dict(os.environ, SCHEMA_CHECK=mode)
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True).stdout
+    wall = (time.perf_counter() - start) * 1000
+    import_ms, first_response_ms = map(float, output.split()[-2:])
+    return import_ms, first_response_ms, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{scratch}/bench.db")
+    os.environ.setdefault("OIDC_CACHE_PATH", f"{scratch}/oidc_cache.json")
+    run_once("create")  # make sure the schema and its version row exist
+
+    print(f"{'SCHEMA_CHECK':<14} {'import':>10} {'1st response':>14} {'process wall':>14}")
+    for mode in ("create", "version"):
+        results = [run_once(mode) for _ in range(args.runs)]
+        import_ms, first_ms, wall_ms = (statistics.median(column) for column in zip(*results))
+        print(f"{mode:<14} {import_ms:>8.1f}ms {first_ms:>12.1f}ms {wall_ms:>12.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
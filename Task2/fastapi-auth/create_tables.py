@@ -1,6 +1,5 @@
-from database import Base, engine
-from models import User, Member
+from schema import ensure_schema
 
 print("Creating database tables...")
-Base.metadata.create_all(bind=engine)
+ensure_schema(mode="create")
 print("Tables created successfully ✅")
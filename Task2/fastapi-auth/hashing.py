@@ -0,0 +1,92 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from passlib.context import CryptContext
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# 0 workers = hash inline on the event loop (old behaviour, handy for benchmarks)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+
+
+# Top-level so the process pool can pickle them
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Runs bcrypt in a bounded process pool so it never blocks the event loop.
+
+    At most ``max_workers`` jobs are handed to the pool at once; everyone else
+    waits on a semaphore, which is what ``queue_depth`` and the wait times measure.
+    """
+
+    def __init__(self, max_workers: int = PASSWORD_HASH_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._slots = None
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            self._slots = asyncio.Semaphore(self.max_workers)
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self.max_workers <= 0:
+            return fn(*args)
+
+        executor = self._get_executor()
+        queued_at = time.perf_counter()
+        self.queue_depth += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queue_depth -= 1
+
+        wait = time.perf_counter() - queued_at
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(_verify, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "avg_wait_ms": round(self.total_wait / self.completed * 1000, 2) if self.completed else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._slots = None
+
+
+hasher = PasswordHasher()
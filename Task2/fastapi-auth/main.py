@@ -1,66 +1,134 @@
+import asyncio
+import logging
 import os
-from fastapi import FastAPI, Request, Form, Depends
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
+import secrets
+import sqlite3
+from typing import Optional
+from fastapi import FastAPI, Request, Form, Depends, File, UploadFile, HTTPException
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from database import SessionLocal, engine, Base
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import AsyncSessionLocal, async_engine
 from models import User, Member
-from passlib.context import CryptContext
-from starlette.middleware.sessions import SessionMiddleware
-from authlib.integrations.starlette_client import OAuth
+from hashing import hasher
+from utils import hash_password, verify_password
+from member_io import iter_rows, import_members, export_members_csv
+from sessions import SESSION_PURGE_INTERVAL, ServerSessionMiddleware, create_session_store
+from page_cache import FingerprintedStaticFiles, PageCache
+from oidc import GOOGLE_DISCOVERY_URL, OIDCMetadataCache
+from throttle import client_ip, login_throttle
+from schema import ensure_schema
 from pydantic import EmailStr, ValidationError
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 # ------------------- Load environment -------------------
 load_dotenv()
 
-SECRET_KEY = os.getenv("SECRET_KEY", "fallback-secret")  # safer
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
 GOOGLE_REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI", "http://127.0.0.1:8000/auth/google")
 
 # ------------------- App setup -------------------
 app = FastAPI()
-app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY)
-
-# Static & templates
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Server-side sessions: the cookie only holds an opaque id (see sessions.py)
+session_store = create_session_store()
+app.add_middleware(ServerSessionMiddleware, store=session_store)
+
+async def purge_expired_sessions_forever():
+    # Expired sessions are otherwise only dropped when read again
+    while True:
+        try:
+            await run_in_threadpool(session_store.purge_expired)
+        except sqlite3.Error:
+            logger.warning("Session purge failed; retrying next interval", exc_info=True)
+        await asyncio.sleep(SESSION_PURGE_INTERVAL)
+
+@app.on_event("startup")
+async def start_session_purge():
+    if SESSION_PURGE_INTERVAL > 0:
+        app.state.session_purge_task = asyncio.create_task(purge_expired_sessions_forever())
+    else:
+        await run_in_threadpool(session_store.purge_expired)
+
+@app.on_event("shutdown")
+async def stop_session_purge():
+    task = getattr(app.state, "session_purge_task", None)
+    if task is not None:
+        task.cancel()
+
+# Static & templates (fingerprinted static URLs, cached context-free pages)
+static_files = FingerprintedStaticFiles(directory="static")
+app.mount("/static", static_files, name="static")
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["static_url"] = static_files.url
+page_cache = PageCache(templates)
+
+# DB setup: runs at startup, not import, and skips DDL when the stored schema version matches
+@app.on_event("startup")
+def setup_schema():
+    ensure_schema()
+
+# Password hashing runs in a process pool (see hashing.py)
+@app.on_event("shutdown")
+async def shutdown_resources():
+    if prefetch_task is not None:
+        prefetch_task.cancel()
+    hasher.shutdown()
+    await async_engine.dispose()
+
+# OAuth setup: authlib is only imported and configured on the first Google login
+oauth = None
+
+# Discovery + JWKS are prefetched and cached (memory + disk) instead of lazily per worker
+google_oidc = OIDCMetadataCache(GOOGLE_DISCOVERY_URL)
+prefetch_task = None
+
+async def get_google_client():
+    global oauth
+    if oauth is None:
+        from authlib.integrations.starlette_client import OAuth
+
+        oauth = OAuth()
+        oauth.register(
+            name="google",
+            client_id=GOOGLE_CLIENT_ID,
+            client_secret=GOOGLE_CLIENT_SECRET,
+            server_metadata_url=GOOGLE_DISCOVERY_URL,
+            client_kwargs={"scope": "openid email profile"},
+        )
+    await google_oidc.apply(oauth.google)
+    return oauth.google
+
+async def prefetch_google_metadata():
+    try:
+        await google_oidc.get()
+    except Exception as exc:
+        logger.warning("Could not prefetch Google OIDC metadata: %s", exc)
 
-# DB setup
-Base.metadata.create_all(bind=engine)
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# OAuth setup
-oauth = OAuth()
-oauth.register(
-    name="google",
-    client_id=GOOGLE_CLIENT_ID,
-    client_secret=GOOGLE_CLIENT_SECRET,
-    server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
-    client_kwargs={"scope": "openid email profile"},
-)
+@app.on_event("startup")
+async def start_google_prefetch():
+    # In the background so a slow or unreachable provider never delays startup
+    global prefetch_task
+    prefetch_task = asyncio.create_task(prefetch_google_metadata())
 
 # DB session dependency
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # ------------------- Home -------------------
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    return page_cache.render(request, "index.html")
 
 # ------------------- Register -------------------
 @app.get("/register", response_class=HTMLResponse)
 async def register_form(request: Request):
-    return templates.TemplateResponse("register.html", {"request": request, "error": None})
+    return page_cache.render(request, "register.html", error=None)
 
 @app.post("/register", response_class=HTMLResponse)
 async def register(
@@ -68,7 +136,7 @@ async def register(
     username: str = Form(...),
     email: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     email = email.strip().lower()
 
@@ -77,34 +145,47 @@ async def register(
     except ValidationError:
         return templates.TemplateResponse("register.html", {"request": request, "error": "❌ Invalid email format."})
 
-    if db.query(User).filter(User.username == username).first():
+    if await db.scalar(select(User).where(User.username == username)):
         return templates.TemplateResponse("register.html", {"request": request, "error": "❌ Username already exists."})
 
-    if db.query(User).filter(User.email == email).first():
+    if await db.scalar(select(User).where(User.email == email)):
         return templates.TemplateResponse("register.html", {"request": request, "error": "❌ Email already registered."})
 
-    hashed_password = pwd_context.hash(password)
+    hashed_password = await hash_password(password)
     new_user = User(username=username, email=email, password=hashed_password)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     return RedirectResponse(url="/login", status_code=303)
 
 # ------------------- Login -------------------
 @app.get("/login", response_class=HTMLResponse)
 async def login_form(request: Request):
-    return templates.TemplateResponse("login.html", {"request": request, "error": None})
+    return page_cache.render(request, "login.html", error=None)
 
 @app.post("/login", response_class=HTMLResponse)
 async def login(
     request: Request,
     username: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    user = db.query(User).filter(User.username == username).first()
-    if not user or not user.password or not pwd_context.verify(password, user.password):
+    # Throttled attempts never reach the DB or bcrypt
+    ip = client_ip(request.client.host if request.client else None, request.headers.get("x-forwarded-for"))
+    if not login_throttle.allow(ip, username):
+        return templates.TemplateResponse(
+            "login.html",
+            {"request": request, "error": "❌ Too many login attempts. Please wait a minute and try again."},
+            status_code=429,
+        )
+
+    try:
+        user = await db.scalar(select(User).where(User.username == username))
+        valid = bool(user and user.password and await verify_password(password, user.password))
+    finally:
+        login_throttle.release(ip)
+    if not valid:
         return templates.TemplateResponse("login.html", {"request": request, "error": "❌ Invalid username or password."})
 
     request.session["user"] = user.username
@@ -115,12 +196,14 @@ async def login(
 # ------------------- Google OAuth -------------------
 @app.get("/login/google")
 async def login_google(request: Request):
+    google = await get_google_client()
     # Use GOOGLE_REDIRECT_URI from .env to avoid mismatch
-    return await oauth.google.authorize_redirect(request, GOOGLE_REDIRECT_URI)
+    return await google.authorize_redirect(request, GOOGLE_REDIRECT_URI)
 
 @app.get("/auth/google")
-async def auth_google(request: Request, db: Session = Depends(get_db)):
-    token = await oauth.google.authorize_access_token(request)
+async def auth_google(request: Request, db: AsyncSession = Depends(get_db)):
+    google = await get_google_client()
+    token = await google.authorize_access_token(request)
     user_info = token.get("userinfo")
 
     if not user_info:
@@ -130,12 +213,12 @@ async def auth_google(request: Request, db: Session = Depends(get_db)):
     username = user_info.get("name", email.split("@")[0])
     picture = user_info.get("picture")
 
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
     if not user:
         new_user = User(username=username, email=email, password=None, profile_pic=picture)
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
         user = new_user
 
     request.session["user"] = user.username
@@ -165,7 +248,7 @@ async def add_member(
     name: str = Form(...),
     email: str = Form(...),
     role: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     user = request.session.get("user")
     if not user:
@@ -178,25 +261,116 @@ async def add_member(
     except ValidationError:
         return templates.TemplateResponse("add_member.html", {"request": request, "error": "❌ Invalid email format."})
 
-    if db.query(Member).filter(Member.email == email).first():
+    if await db.scalar(select(Member).where(Member.email == email)):
         return templates.TemplateResponse("add_member.html", {"request": request, "error": "❌ Member email already exists."})
 
     new_member = Member(name=name, email=email, role=role)
     db.add(new_member)
-    db.commit()
-    db.refresh(new_member)
+    await db.commit()
+    await db.refresh(new_member)
 
     return RedirectResponse(url="/members", status_code=303)
 
 # ------------------- Members -------------------
+# Keyset pagination on members.id: ?after=<id> for the next page, ?before=<id> for the previous one
+MEMBERS_PAGE_SIZE = int(os.getenv("MEMBERS_PAGE_SIZE", "25"))
+MEMBERS_MAX_PAGE_SIZE = 100
+
 @app.get("/members", response_class=HTMLResponse)
-async def members(request: Request, db: Session = Depends(get_db)):
+async def members(
+    request: Request,
+    after: Optional[int] = None,
+    before: Optional[int] = None,
+    limit: int = MEMBERS_PAGE_SIZE,
+    db: AsyncSession = Depends(get_db)
+):
+    user = request.session.get("user")
+    if not user:
+        return RedirectResponse(url="/login")
+
+    limit = max(1, min(limit, MEMBERS_MAX_PAGE_SIZE))
+    query = select(Member)
+    if before is not None:
+        query = query.where(Member.id < before).order_by(Member.id.desc())
+    else:
+        if after is not None:
+            query = query.where(Member.id > after)
+        query = query.order_by(Member.id)
+
+    # Fetch one extra row to learn whether another page exists
+    members = list((await db.scalars(query.limit(limit + 1))).all())
+    has_more = len(members) > limit
+    members = members[:limit]
+
+    if before is not None:
+        members.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = after is not None, has_more
+
+    return templates.TemplateResponse("members.html", {
+        "request": request,
+        "members": members,
+        "limit": limit,
+        "prev_cursor": members[0].id if members and has_prev else None,
+        "next_cursor": members[-1].id if members and has_next else None,
+    })
+
+# ------------------- Bulk Import / Export -------------------
+@app.get("/members/import", response_class=HTMLResponse)
+async def import_members_form(request: Request):
+    user = request.session.get("user")
+    if not user:
+        return RedirectResponse(url="/login")
+    return templates.TemplateResponse("import_members.html", {"request": request, "report": None})
+
+@app.post("/members/import", response_class=HTMLResponse)
+async def import_members_upload(
+    request: Request,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db)
+):
+    user = request.session.get("user")
+    if not user:
+        return RedirectResponse(url="/login")
+
+    report = await import_members(db, iter_rows(file.file, file.filename or ""))
+    return templates.TemplateResponse("import_members.html", {"request": request, "report": report})
+
+@app.get("/members/export.csv")
+async def export_members(request: Request):
     user = request.session.get("user")
     if not user:
         return RedirectResponse(url="/login")
 
-    members = db.query(Member).all()
-    return templates.TemplateResponse("members.html", {"request": request, "members": members})
+    return StreamingResponse(
+        export_members_csv(AsyncSessionLocal),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="members.csv"'},
+    )
+
+# ------------------- Operational stats -------------------
+# Internal only: with STATS_TOKEN set, callers send it as X-Stats-Token; without it,
+# only direct loopback requests (no proxy in between) are answered
+STATS_TOKEN = os.getenv("STATS_TOKEN")
+LOOPBACK = ("127.0.0.1", "::1")
+
+async def require_stats_access(request: Request):
+    if STATS_TOKEN:
+        allowed = secrets.compare_digest(request.headers.get("x-stats-token", ""), STATS_TOKEN)
+    else:
+        proxied = "x-forwarded-for" in request.headers or "forwarded" in request.headers
+        allowed = bool(request.client) and request.client.host in LOOPBACK and not proxied
+    if not allowed:
+        raise HTTPException(status_code=404)
+
+@app.get("/hasher/stats", dependencies=[Depends(require_stats_access)])
+async def hasher_stats():
+    return hasher.stats()
+
+@app.get("/login/stats", dependencies=[Depends(require_stats_access)])
+async def login_stats():
+    return login_throttle.stats()
 
 # ------------------- Logout -------------------
 @app.get("/logout")
@@ -0,0 +1,212 @@
+import csv
+import io
+import json
+from pydantic import EmailStr
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from models import Member
+
+IMPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_SIZE = 1000
+MEMBER_FIELDS = ("name", "email", "role")
+
+
+# ------------------- Import -------------------
+JSON_READ_SIZE = 64 * 1024
+
+
+class ImportFileError(ValueError):
+    """The upload can't be read past ``row`` (bad encoding, cut-off JSON, broken CSV)."""
+
+    def __init__(self, row: int, message: str):
+        super().__init__(message)
+        self.row = row
+
+
+def iter_rows(binary_file, filename: str):
+    """Yield (row_number, dict) from an uploaded CSV or JSON file without reading it all.
+
+    CSV needs a header line with name,email,role. JSON is read as JSON Lines
+    (one object per line); a single top-level array is also accepted and parsed
+    one element at a time. Raises ImportFileError where the file stops being readable.
+    """
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    number = 0
+    try:
+        if not filename.lower().endswith((".json", ".jsonl", ".ndjson")):
+            for number, row in enumerate(csv.DictReader(text), start=1):
+                yield number, row
+            return
+
+        first = text.read(1)
+        while first.isspace():
+            first = text.read(1)
+        if first == "[":
+            for number, row in enumerate(_iter_json_array(text), start=1):
+                yield number, row
+            return
+
+        for line in _prepend(first, text):
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                yield number, json.loads(line)
+            except json.JSONDecodeError:
+                yield number, None
+    except UnicodeDecodeError:
+        raise ImportFileError(number + 1, "File is not valid UTF-8.")
+    except json.JSONDecodeError:
+        raise ImportFileError(number + 1, "JSON array is malformed or cut off.")
+    except csv.Error as exc:
+        raise ImportFileError(number + 1, f"Unreadable CSV: {exc}.")
+
+
+def _iter_json_array(text):
+    """Decode the elements of a JSON array (after its ``[``) as they arrive."""
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+    expect_value, count = True, 0
+    while True:
+        while pos < len(buffer) and buffer[pos].isspace():
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                raise json.JSONDecodeError("Unterminated array", buffer, pos)
+            chunk = text.read(JSON_READ_SIZE)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+            continue
+        if not expect_value:
+            if buffer[pos] == "]":
+                return
+            if buffer[pos] != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            pos, expect_value = pos + 1, True
+            continue
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            value, end = None, None
+        # A value that ends the buffer (or failed to parse) may just be cut off: read more first
+        if (end is None or end == len(buffer)) and not eof:
+            chunk = text.read(JSON_READ_SIZE)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+            continue
+        if end is None:
+            if buffer[pos] == "]" and not count:
+                return
+            raise json.JSONDecodeError("Expecting value", buffer, pos)
+        yield value
+        pos, expect_value, count = end, False, count + 1
+
+
+def _prepend(first: str, text):
+    yield first + text.readline()
+    yield from text
+
+
+def clean_row(row):
+    """Return (member dict, None) for a valid row or (None, error message)."""
+    if not isinstance(row, dict):
+        return None, "Row is not a valid record."
+    member = {field: str(row.get(field) or "").strip() for field in MEMBER_FIELDS}
+    missing = [field for field in MEMBER_FIELDS if not member[field]]
+    if missing:
+        return None, f"Missing {', '.join(missing)}."
+    member["email"] = member["email"].lower()
+    try:
+        EmailStr.validate(member["email"])
+    except ValueError:
+        return None, "Invalid email format."
+    return member, None
+
+
+async def import_members(db, rows):
+    """Insert members in batches; duplicates are checked per batch with one IN query.
+
+    A batch that still hits the unique email index (a concurrent insert) is
+    retried row by row, so only the conflicting rows are reported.
+    """
+    report = {"inserted": 0, "errors": []}
+    seen = set()
+    batch = []
+
+    async def flush():
+        emails = [member["email"] for _, member in batch]
+        existing = set((await db.scalars(select(Member.email).where(Member.email.in_(emails)))).all())
+        fresh = []
+        for number, member in batch:
+            if member["email"] in existing:
+                report["errors"].append({"row": number, "email": member["email"], "error": "Member email already exists."})
+            else:
+                fresh.append((number, member))
+        if fresh:
+            try:
+                await db.execute(insert(Member), [member for _, member in fresh])
+                await db.commit()
+                report["inserted"] += len(fresh)
+            except IntegrityError:
+                # Someone added one of these emails after our check: redo the batch row by row
+                await db.rollback()
+                await insert_one_by_one(fresh)
+        batch.clear()
+
+    async def insert_one_by_one(members):
+        for number, member in members:
+            try:
+                await db.execute(insert(Member), [member])
+                await db.commit()
+                report["inserted"] += 1
+            except IntegrityError:
+                await db.rollback()
+                report["errors"].append({"row": number, "email": member["email"], "error": "Member email already exists."})
+
+    try:
+        for number, row in rows:
+            member, error = clean_row(row)
+            if error:
+                email = row.get("email") if isinstance(row, dict) else None
+                report["errors"].append({"row": number, "email": email, "error": error})
+                continue
+            if member["email"] in seen:
+                report["errors"].append({"row": number, "email": member["email"], "error": "Duplicate email in file."})
+                continue
+            seen.add(member["email"])
+            batch.append((number, member))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await flush()
+    except ImportFileError as exc:
+        # Rows before the damage are still imported; the report says where reading stopped
+        report["errors"].append({"row": exc.row, "email": None, "error": f"{exc} Stopped reading here."})
+
+    if batch:
+        await flush()
+    report["errors"].sort(key=lambda error: error["row"])
+    return report
+
+
+# ------------------- Export -------------------
+async def export_members_csv(session_factory):
+    """Stream the members table as CSV, walking it in keyset chunks."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(("id",) + MEMBER_FIELDS)
+    yield buffer.getvalue()
+
+    last_id = 0
+    async with session_factory() as db:
+        while True:
+            rows = (await db.execute(
+                select(Member.id, Member.name, Member.email, Member.role)
+                .where(Member.id > last_id)
+                .order_by(Member.id)
+                .limit(EXPORT_CHUNK_SIZE)
+            )).all()
+            if not rows:
+                break
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            last_id = rows[-1].id
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import httpx
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_DISCOVERY_URL = "https://accounts.google.com/.well-known/openid-configuration"
+OIDC_CACHE_PATH = os.getenv("OIDC_CACHE_PATH", "oidc_cache.json")
+OIDC_CACHE_TTL = int(os.getenv("OIDC_CACHE_TTL", "3600"))  # seconds
+OIDC_RETRY_AFTER = 60  # seconds to keep a stale copy after a failed refresh
+
+
+class OIDCMetadataCache:
+    """Discovery document + JWKS for one provider, held in memory with a TTL.
+
+    Every successful fetch is also written to ``cache_path`` so a restarted
+    worker can start from disk instead of going to the network. Failed fetches
+    are retried with exponential backoff; if they keep failing a stale copy
+    (memory or disk) is served rather than breaking login.
+    """
+
+    def __init__(self, discovery_url: str, cache_path: str = OIDC_CACHE_PATH, ttl: int = OIDC_CACHE_TTL,
+                 retries: int = 3, backoff: float = 0.5, transport=None):
+        self.discovery_url = discovery_url
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.retries = retries
+        self.backoff = backoff
+        self.transport = transport
+        self.metadata = None
+        self.fetched_at = 0.0
+        self.retry_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def is_fresh(self) -> bool:
+        now = time.time()
+        return self.metadata is not None and (now - self.fetched_at < self.ttl or now < self.retry_at)
+
+    async def get(self) -> dict:
+        if self.is_fresh():
+            return self.metadata
+        async with self._lock:
+            if self.is_fresh():
+                return self.metadata
+            if self.metadata is None:
+                self._load_from_disk()
+                if self.is_fresh():
+                    return self.metadata
+            try:
+                self.metadata = await self._fetch_with_retry()
+                self.fetched_at = time.time()
+                self._save_to_disk()
+            except httpx.HTTPError:
+                if self.metadata is None:
+                    raise
+                # Keep serving the stale copy for a while instead of retrying on every request
+                self.retry_at = time.time() + OIDC_RETRY_AFTER
+                logger.warning("OIDC metadata refresh failed, serving cached copy from %s", time.ctime(self.fetched_at))
+        return self.metadata
+
+    async def apply(self, client):
+        """Hand the cached metadata to an authlib client so it never fetches it itself."""
+        metadata = await self.get()
+        # authlib skips its own discovery request once "_loaded_at" is set
+        client.server_metadata.update(metadata, _loaded_at=self.fetched_at)
+
+    async def _fetch_with_retry(self) -> dict:
+        for attempt in range(self.retries):
+            try:
+                return await self._fetch()
+            except httpx.HTTPError as exc:
+                if attempt == self.retries - 1:
+                    raise
+                delay = self.backoff * 2 ** attempt
+                logger.warning("OIDC metadata fetch failed (%s), retrying in %.1fs", exc, delay)
+                await asyncio.sleep(delay)
+
+    async def _fetch(self) -> dict:
+        async with httpx.AsyncClient(transport=self.transport, timeout=10) as client:
+            resp = await client.get(self.discovery_url)
+            resp.raise_for_status()
+            metadata = resp.json()
+            if "jwks_uri" in metadata:
+                resp = await client.get(metadata["jwks_uri"])
+                resp.raise_for_status()
+                metadata["jwks"] = resp.json()
+        return metadata
+
+    def _load_from_disk(self):
+        try:
+            with open(self.cache_path) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return
+        if cached.get("discovery_url") == self.discovery_url:
+            self.metadata = cached["metadata"]
+            self.fetched_at = cached["fetched_at"]
+
+    def _save_to_disk(self):
+        tmp_path = f"{self.cache_path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"discovery_url": self.discovery_url, "fetched_at": self.fetched_at, "metadata": self.metadata}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            logger.warning("Could not write OIDC cache to %s", self.cache_path)
@@ -0,0 +1,112 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from urllib.parse import parse_qs
+from fastapi.responses import HTMLResponse, Response
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+COMPRESSIBLE = (".css", ".js", ".svg", ".html", ".txt", ".json", ".ico")
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def not_modified(request_headers, etag: str) -> bool:
+    """If-None-Match check with the weak comparison RFC 9110 requires (W/ is ignored)."""
+    if_none_match = request_headers.get("if-none-match", "")
+    if if_none_match.strip() == "*":
+        return True
+    return _opaque_tag(etag) in (_opaque_tag(tag) for tag in if_none_match.split(","))
+
+
+# ------------------- Rendered pages -------------------
+class PageCache:
+    """Renders context-free pages once and serves the stored bytes with a strong ETag.
+
+    Only use it for templates whose output depends on nothing but ``context``
+    (no session, no per-user data).
+    """
+
+    def __init__(self, templates):
+        self.templates = templates
+        self._pages = {}
+
+    def render(self, request, name: str, **context):
+        key = (name, tuple(sorted(context.items())))
+        page = self._pages.get(key)
+        if page is None:
+            body = self.templates.get_template(name).render({"request": request, **context}).encode("utf-8")
+            page = self._pages[key] = (body, make_etag(body))
+
+        body, etag = page
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if not_modified(request.headers, etag):
+            return Response(status_code=304, headers=headers)
+        return HTMLResponse(body, headers=headers)
+
+    def clear(self):
+        self._pages.clear()
+
+
+# ------------------- Static assets -------------------
+class FingerprintedStaticFiles(StaticFiles):
+    """StaticFiles that fingerprints URLs and serves pre-compressed gzip variants.
+
+    ``url("style.css")`` returns ``/static/style.css?v=<hash>``; requests carrying
+    the ``v`` fingerprint are cached by browsers forever since the URL changes
+    whenever the file does.
+    """
+
+    def __init__(self, *, directory: str, prefix: str = "/static", **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.prefix = prefix
+        self.fingerprints = {}
+        self.gzipped = {}
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                full_path = os.path.join(root, filename)
+                path = os.path.relpath(full_path, directory).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    content = f.read()
+                self.fingerprints[path] = hashlib.sha256(content).hexdigest()[:12]
+                if filename.endswith(COMPRESSIBLE):
+                    compressed = gzip.compress(content, compresslevel=9)
+                    if len(compressed) < len(content):
+                        self.gzipped[path] = (compressed, make_etag(compressed))
+
+    def url(self, path: str) -> str:
+        fingerprint = self.fingerprints.get(path)
+        return f"{self.prefix}/{path}?v={fingerprint}" if fingerprint else f"{self.prefix}/{path}"
+
+    async def get_response(self, path: str, scope):
+        request_headers = Headers(scope=scope)
+        key = path.replace(os.sep, "/")
+        gzipped = self.gzipped.get(key)
+
+        if gzipped and scope["method"] in ("GET", "HEAD") and "gzip" in request_headers.get("accept-encoding", ""):
+            body, etag = gzipped
+            headers = {"ETag": etag, "Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+            if not_modified(request_headers, etag):
+                response = Response(status_code=304, headers=headers)
+            else:
+                response = Response(body, media_type=mimetypes.guess_type(key)[0], headers=headers)
+        else:
+            response = await super().get_response(path, scope)
+            if gzipped:
+                response.headers["Vary"] = "Accept-Encoding"
+
+        # Only the current fingerprint may be cached forever: a stale or made-up ?v= must revalidate
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        fingerprint = self.fingerprints.get(key)
+        if response.status_code in (200, 304) and fingerprint and query.get("v") == [fingerprint]:
+            response.headers["Cache-Control"] = IMMUTABLE
+        return response
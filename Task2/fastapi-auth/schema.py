@@ -0,0 +1,54 @@
+import hashlib
+import os
+from sqlalchemy import Column, MetaData, String, Table, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateIndex, CreateTable
+from database import Base, engine
+import models  # noqa: F401  (registers the tables on Base.metadata)
+
+# version = check the stored schema version and only run DDL when it changed
+# create  = always run create_all (old behaviour)
+# skip    = never touch the schema at startup
+SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "version")
+
+# Kept out of Base.metadata so it never shows up in the app's own DDL
+version_table = Table("schema_version", MetaData(), Column("version", String(64), primary_key=True))
+
+
+def schema_version(bind=engine) -> str:
+    """Hash of the DDL for every model, so any model change produces a new version."""
+    ddl = []
+    for table in Base.metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=bind.dialect)))
+        ddl.extend(str(CreateIndex(index).compile(dialect=bind.dialect)) for index in sorted(table.indexes, key=lambda i: i.name or ""))
+    return hashlib.sha256("\n".join(ddl).encode("utf-8")).hexdigest()
+
+
+def stored_version(conn):
+    try:
+        return conn.execute(select(version_table.c.version)).scalar()
+    except SQLAlchemyError:
+        conn.rollback()
+        return None
+
+
+def ensure_schema(bind=engine, mode: str = SCHEMA_CHECK) -> bool:
+    """Bring the schema up to date; return True if DDL was run.
+
+    With mode="version" a matching stored version costs a single SELECT instead
+    of create_all's per-table reflection.
+    """
+    if mode == "skip":
+        return False
+
+    expected = schema_version(bind)
+    with bind.connect() as conn:
+        if mode == "version" and stored_version(conn) == expected:
+            return False
+
+    Base.metadata.create_all(bind=bind)
+    with bind.begin() as conn:
+        version_table.create(conn, checkfirst=True)
+        conn.execute(version_table.delete())
+        conn.execute(version_table.insert().values(version=expected))
+    return True
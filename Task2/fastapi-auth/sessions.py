@@ -0,0 +1,176 @@
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from http.cookies import SimpleCookie
+
+from starlette.concurrency import run_in_threadpool
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")  # memory | sqlite
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "sessions.db")
+SESSION_TTL = int(os.getenv("SESSION_TTL", str(14 * 24 * 3600)))  # seconds
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+SESSION_PURGE_INTERVAL = float(os.getenv("SESSION_PURGE_INTERVAL", "3600"))  # seconds, 0 = startup only
+
+
+# ------------------- Stores -------------------
+class MemorySessionStore:
+    """In-process LRU with TTL. Fast, but only correct with a single worker."""
+
+    blocking = False
+
+    def __init__(self, ttl: int = SESSION_TTL, max_entries: int = SESSION_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str):
+        with self._lock:
+            entry = self._data.get(session_id)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires < time.time():
+                del self._data[session_id]
+                return None
+            self._data.move_to_end(session_id)
+            return dict(data)
+
+    def set(self, session_id: str, data: dict):
+        with self._lock:
+            self._data[session_id] = (time.time() + self.ttl, dict(data))
+            self._data.move_to_end(session_id)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._data.pop(session_id, None)
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            for session_id in [key for key, (expires, _) in self._data.items() if expires < now]:
+                del self._data[session_id]
+
+
+class SQLiteSessionStore:
+    """Sessions in a local SQLite file, shared by every worker on the host."""
+
+    # Calls may wait on the file lock (up to ``timeout``): keep them off the event loop
+    blocking = True
+
+    def __init__(self, path: str = SESSION_DB_PATH, ttl: int = SESSION_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_sessions_expires ON sessions (expires)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id: str):
+        row = self._connect().execute(
+            "SELECT data FROM sessions WHERE id = ? AND expires >= ?", (session_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, session_id: str, data: dict):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO sessions (id, data, expires) VALUES (?, ?, ?)",
+            (session_id, json.dumps(data), time.time() + self.ttl),
+        )
+
+    def delete(self, session_id: str):
+        self._connect().execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def purge_expired(self):
+        self._connect().execute("DELETE FROM sessions WHERE expires < ?", (time.time(),))
+
+
+def create_session_store(backend: str = SESSION_BACKEND):
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    if backend == "memory":
+        return MemorySessionStore()
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+
+
+# ------------------- Middleware -------------------
+class ServerSessionMiddleware:
+    """Drop-in replacement for starlette's SessionMiddleware.
+
+    ``request.session`` works exactly as before, but the data lives in ``store``
+    and the cookie only carries a random session id, so nothing is signed or
+    serialized into headers on each request. Any change to the session (e.g.
+    logging in) moves it to a fresh id, so an id planted before the change
+    is worthless afterwards.
+    """
+
+    def __init__(self, app, store=None, session_cookie: str = "session_id", max_age: int = SESSION_TTL,
+                 same_site: str = "lax", https_only: bool = False):
+        self.app = app
+        self.store = store or create_session_store()
+        self.session_cookie = session_cookie
+        self.max_age = max_age
+        self.cookie_flags = f"path=/; Max-Age={max_age}; httponly; samesite={same_site}"
+        if https_only:
+            self.cookie_flags += "; secure"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        session_id = self._read_cookie(scope)
+        stored = await self._call_store(self.store.get, session_id) if session_id else None
+        if stored is None:
+            session_id = None
+        scope["session"] = dict(stored or {})
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                cookie = await self._save(session_id, stored, scope["session"])
+                if cookie:
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _read_cookie(self, scope):
+        for name, value in scope.get("headers", []):
+            if name == b"cookie":
+                morsel = SimpleCookie(value.decode("latin-1")).get(self.session_cookie)
+                if morsel:
+                    return morsel.value
+        return None
+
+    async def _call_store(self, fn, *args):
+        if self.store.blocking:
+            return await run_in_threadpool(fn, *args)
+        return fn(*args)
+
+    async def _save(self, session_id, stored, session):
+        """Persist the session if it changed; return a Set-Cookie value when the cookie must change."""
+        if session == (stored or {}):
+            return None
+        if session_id:
+            await self._call_store(self.store.delete, session_id)
+        if not session:
+            return f"{self.session_cookie}=null; path=/; expires=Thu, 01 Jan 1970 00:00:00 GMT; httponly"
+        session_id = secrets.token_urlsafe(32)
+        await self._call_store(self.store.set, session_id, session)
+        return f"{self.session_cookie}={session_id}; {self.cookie_flags}"
@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# Tokens refill continuously at rate/60 per second up to burst
+LOGIN_IP_RATE = float(os.getenv("LOGIN_IP_RATE", "20"))  # attempts per minute per client IP
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "10"))
+LOGIN_USER_RATE = float(os.getenv("LOGIN_USER_RATE", "10"))  # attempts per minute per username
+LOGIN_USER_BURST = int(os.getenv("LOGIN_USER_BURST", "5"))
+# Attempts one client IP may have waiting on bcrypt at once: a burst can't queue ahead of everyone else
+LOGIN_IP_CONCURRENCY = int(os.getenv("LOGIN_IP_CONCURRENCY", "1"))
+# Reverse proxies (comma-separated IPs) whose X-Forwarded-For is trusted for the client IP
+TRUSTED_PROXIES = {ip.strip() for ip in os.getenv("TRUSTED_PROXIES", "").split(",") if ip.strip()}
+
+
+def client_ip(peer: Optional[str], forwarded_for: Optional[str], trusted=TRUSTED_PROXIES) -> str:
+    """The address a request came from, looking through our own proxies.
+
+    X-Forwarded-For is read right to left and the first hop that isn't a
+    trusted proxy wins; entries further left are client-supplied and ignored.
+    """
+    peer = peer or "unknown"
+    if peer not in trusted or not forwarded_for:
+        return peer
+    for hop in reversed([hop.strip() for hop in forwarded_for.split(",") if hop.strip()]):
+        if hop not in trusted:
+            return hop
+    return peer
+
+
+class TokenBucketLimiter:
+    """One token bucket per key, kept in a bounded LRU so memory stays flat under attack."""
+
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int = 100_000):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed
+
+
+class LoginThrottle:
+    """Gate in front of /login: an attempt must pass both the IP and the username bucket,
+    and its IP may not already have LOGIN_IP_CONCURRENCY attempts in progress.
+
+    Every allowed attempt must be paired with ``release(client_ip)``.
+    """
+
+    def __init__(self, concurrency: int = LOGIN_IP_CONCURRENCY):
+        self.by_ip = TokenBucketLimiter(LOGIN_IP_RATE, LOGIN_IP_BURST)
+        self.by_user = TokenBucketLimiter(LOGIN_USER_RATE, LOGIN_USER_BURST)
+        self.concurrency = concurrency
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    def allow(self, client_ip: str, username: str) -> bool:
+        with self._lock:
+            busy = self._in_flight.get(client_ip, 0) >= self.concurrency
+            ok = not busy and self.by_ip.allow(client_ip) and self.by_user.allow(username.strip().lower())
+            if ok:
+                self._in_flight[client_ip] = self._in_flight.get(client_ip, 0) + 1
+                self.allowed += 1
+            else:
+                self.rejected += 1
+            return ok
+
+    def release(self, client_ip: str):
+        with self._lock:
+            remaining = self._in_flight.get(client_ip, 0) - 1
+            if remaining > 0:
+                self._in_flight[client_ip] = remaining
+            else:
+                self._in_flight.pop(client_ip, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"allowed": self.allowed, "rejected": self.rejected, "in_flight": sum(self._in_flight.values())}
+
+
+login_throttle = LoginThrottle()
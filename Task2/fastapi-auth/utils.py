@@ -1,9 +1,7 @@
-from passlib.context import CryptContext
+from hashing import hasher
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+async def hash_password(password: str) -> str:
+    return await hasher.hash(password)
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await hasher.verify(plain_password, hashed_password)
@@ -3,6 +3,8 @@ from pathlib import Path
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
+from .sql_metrics import instrument_engine
+from .pool_metrics import PoolHealthChecker, TimedQueuePool
 
 # 🔹 Load .env file from project root
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -17,12 +19,36 @@ if not DATABASE_URL:
 # ✅ MySQL does not need check_same_thread
 connect_args = {}
 
+# 🔹 Pool settings (tune from .env)
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))     # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))     # keep below MySQL wait_timeout
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "false").lower() == "true"
+DB_HEALTH_CHECK_INTERVAL = float(os.environ.get("DB_HEALTH_CHECK_INTERVAL", "30"))  # 0 disables
+
+pool_kwargs = {}
+if ":memory:" not in DATABASE_URL:
+    pool_kwargs = {
+        "poolclass": TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+
 # 🔹 Create SQLAlchemy engine
+# Stale connections are handled by recycle + the background health checker,
+# so checkouts don't pay a SELECT 1 round trip unless DB_POOL_PRE_PING=true.
 engine = create_engine(
     DATABASE_URL,
-    pool_pre_ping=True,  # reconnect if MySQL connection drops
-    echo=True            # log SQL queries for debugging
+    pool_pre_ping=DB_POOL_PRE_PING,
+    **pool_kwargs
 )
+pool_health = PoolHealthChecker(engine, interval=DB_HEALTH_CHECK_INTERVAL)
+
+# 🔹 Per-request query count/time, slow-query log and N+1 warnings (see sql_metrics.py)
+instrument_engine(engine)
 
 # 🔹 Create session and base
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -1,26 +1,32 @@
 import os
 import re
+from typing import List, Optional
 from fastapi import FastAPI, Request, Form, Depends
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, PlainTextResponse, JSONResponse, Response
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, select, update, delete
 from sqlalchemy.exc import SQLAlchemyError
 from authlib.integrations.starlette_client import OAuth
 from email_validator import validate_email, EmailNotValidError
 from dotenv import load_dotenv
 
-from .database import SessionLocal, engine, Base
+from .database import SessionLocal, engine, Base, pool_health
 from .models import User, Member
+from . import sql_metrics
+from .pool_metrics import render_pool_metrics
+from .member_cache import member_cache
+from .search import setup_search_index, search_members
 
 # 🔹 Load environment variables
 load_dotenv()
 
 # ✅ Create DB tables
 Base.metadata.create_all(bind=engine)
+setup_search_index(engine)
 
 app = FastAPI()
 
@@ -28,6 +34,24 @@ app = FastAPI()
 SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret")
 app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY)
 
+# ✅ Background DB health check (replaces per-checkout pre-ping)
+@app.on_event("startup")
+def start_pool_health():
+    pool_health.start()
+
+@app.on_event("shutdown")
+def stop_pool_health():
+    pool_health.stop()
+
+# ✅ SQL instrumentation per request
+@app.middleware("http")
+async def track_sql(request: Request, call_next):
+    stats = sql_metrics.start_request()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    sql_metrics.finish_request(route.path if route else "unmatched", stats)
+    return response
+
 # ✅ Templates & Static
 templates = Jinja2Templates(directory="app/templates")
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
@@ -67,6 +91,12 @@ def get_current_user(request: Request, db: Session):
 def root():
     return RedirectResponse("/login")
 
+# ✅ Prometheus metrics
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body = sql_metrics.metrics.render() + member_cache.render_metrics() + render_pool_metrics(engine, pool_health)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
 # ✅ Register
 @app.get("/register")
 def register_get(request: Request):
@@ -184,16 +214,49 @@ def logout(request: Request):
 
 # ✅ Welcome page
 @app.get("/welcome")
-def welcome(request: Request, db: Session = Depends(get_db)):
+def welcome(
+    request: Request,
+    after: Optional[int] = None,
+    before: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    if not request.session.get("user_id"):
+        return RedirectResponse("/login")
+    # 🔹 Keyset page of members, served from the in-process page cache
+    page = member_cache.get_page(db, after=after, before=before)
+    return templates.TemplateResponse("welcome.html", {
+        "request": request,
+        "username": request.session.get("username"),
+        "members": page["members"],
+        "prev_cursor": page["prev_cursor"],
+        "next_cursor": page["next_cursor"],
+    })
+
+# ✅ Member search (FTS5 on SQLite, FULLTEXT on MySQL)
+@app.get("/search")
+def search(request: Request, q: str = "", page: int = 1, db: Session = Depends(get_db)):
     if not request.session.get("user_id"):
         return RedirectResponse("/login")
-    members = db.query(Member).all()
+    page = max(page, 1)
+    members, has_more = search_members(db, q, page)
     return templates.TemplateResponse("welcome.html", {
         "request": request,
         "username": request.session.get("username"),
-        "members": members
+        "members": members,
+        "query": q,
+        "prev_page": page - 1 if page > 1 else None,
+        "next_page": page + 1 if has_more else None,
     })
 
+# 🔹 Partial responses: fetch() callers send HX-Request and get just the changed row back
+def wants_partial(request: Request) -> bool:
+    return request.headers.get("HX-Request") == "true"
+
+
+def render_member_row(request: Request, member_id, name, email, phone, organization):
+    member = {"id": member_id, "name": name, "email": email, "phone": phone, "organization": organization}
+    return templates.TemplateResponse("_member_row.html", {"request": request, "m": member})
+
 # ✅ Add Member
 @app.post("/add-member")
 def add_member_post(
@@ -210,10 +273,18 @@ def add_member_post(
     try:
         member = Member(name=name, email=email, phone=phone, organization=organization)
         db.add(member)
+        db.flush()
+        new_id = member.id
         db.commit()
+        member_cache.invalidate(new_id)
     except SQLAlchemyError:
         db.rollback()
+        if wants_partial(request):
+            return PlainTextResponse("Could not add member (duplicate email?).", status_code=409)
+        return RedirectResponse("/welcome", status_code=302)
 
+    if wants_partial(request):
+        return render_member_row(request, new_id, name, email, phone, organization)
     return RedirectResponse("/welcome", status_code=302)
 
 # ✅ Edit Member
@@ -232,14 +303,25 @@ def edit_member_post(
 
     member = db.query(Member).filter(Member.id == member_id).first()
     if not member:
+        if wants_partial(request):
+            return PlainTextResponse("Member not found.", status_code=404)
         return RedirectResponse("/welcome", status_code=302)
 
     member.name = name
     member.email = email
     member.phone = phone
     member.organization = organization
-    db.commit()
+    try:
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        if wants_partial(request):
+            return PlainTextResponse("Could not update member (duplicate email?).", status_code=409)
+        return RedirectResponse("/welcome", status_code=302)
+    member_cache.invalidate(member_id)
 
+    if wants_partial(request):
+        return render_member_row(request, member_id, name, email, phone, organization)
     return RedirectResponse("/welcome", status_code=302)
 
 # ✅ Delete Member
@@ -256,5 +338,73 @@ def delete_member_post(
     if member:
         db.delete(member)
         db.commit()
+        member_cache.invalidate(member_id)
 
+    if wants_partial(request):
+        # Already-gone rows count as removed too, so the client just drops them
+        return Response(status_code=200, headers={"X-Removed-Member": str(member_id)})
     return RedirectResponse("/welcome", status_code=302)
+
+# ✅ Bulk edit / delete
+BULK_BATCH_SIZE = 500
+
+def _batches(ids):
+    ids = list(dict.fromkeys(ids))  # de-duplicate, keep order
+    for i in range(0, len(ids), BULK_BATCH_SIZE):
+        yield ids[i:i + BULK_BATCH_SIZE]
+
+@app.post("/bulk-edit-members")
+def bulk_edit_members_post(
+    request: Request,
+    member_ids: List[int] = Form(...),
+    name: str = Form(""),
+    phone: str = Form(""),
+    organization: str = Form(""),
+    db: Session = Depends(get_db)
+):
+    if not request.session.get("user_id"):
+        return JSONResponse({"error": "Not logged in."}, status_code=401)
+
+    # Blank fields are left unchanged; email is unique so it can't be bulk-edited
+    patch = {k: v.strip() for k, v in {"name": name, "phone": phone, "organization": organization}.items() if v.strip()}
+    if not patch:
+        return JSONResponse({"error": "Nothing to update."}, status_code=400)
+
+    results = {}
+    try:
+        for batch in _batches(member_ids):
+            found = set(db.scalars(select(Member.id).where(Member.id.in_(batch))))
+            if found:
+                db.execute(update(Member).where(Member.id.in_(found)).values(**patch))
+            results.update({member_id: "updated" if member_id in found else "not_found" for member_id in batch})
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        return JSONResponse({"error": "Database error. Nothing was changed."}, status_code=500)
+
+    member_cache.invalidate(*[i for i, r in results.items() if r == "updated"])
+    return {"results": results}
+
+@app.post("/bulk-delete-members")
+def bulk_delete_members_post(
+    request: Request,
+    member_ids: List[int] = Form(...),
+    db: Session = Depends(get_db)
+):
+    if not request.session.get("user_id"):
+        return JSONResponse({"error": "Not logged in."}, status_code=401)
+
+    results = {}
+    try:
+        for batch in _batches(member_ids):
+            found = set(db.scalars(select(Member.id).where(Member.id.in_(batch))))
+            if found:
+                db.execute(delete(Member).where(Member.id.in_(found)))
+            results.update({member_id: "deleted" if member_id in found else "not_found" for member_id in batch})
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        return JSONResponse({"error": "Database error. Nothing was deleted."}, status_code=500)
+
+    member_cache.invalidate(*[i for i, r in results.items() if r == "deleted"])
+    return {"results": results}
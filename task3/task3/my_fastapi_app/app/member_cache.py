@@ -0,0 +1,131 @@
+import os
+import threading
+from collections import OrderedDict
+from sqlalchemy import select
+from .models import Member
+
+# 🔹 Tunables
+WELCOME_PAGE_SIZE = int(os.environ.get("WELCOME_PAGE_SIZE", "25"))
+MEMBER_CACHE_PAGES = int(os.environ.get("MEMBER_CACHE_PAGES", "512"))
+
+MEMBER_COLUMNS = (Member.id, Member.name, Member.email, Member.phone, Member.organization)
+
+
+class MemberPageCache:
+    """In-process cache of keyset pages of the member directory.
+
+    Every page remembers the id window its query scanned, so a write to member
+    ``id`` only drops the pages whose window contains that id.
+    """
+
+    def __init__(self, page_size: int = WELCOME_PAGE_SIZE, max_pages: int = MEMBER_CACHE_PAGES):
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._generation = 0
+
+    def get_page(self, db, after=None, before=None) -> dict:
+        key = ("before", before) if before is not None else ("after", after)
+        with self._lock:
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                return page
+            self.misses += 1
+            generation = self._generation
+
+        page = self._load(db, after, before)
+        with self._lock:
+            # A write landed while we were reading: serve the page but don't cache it
+            if generation != self._generation:
+                return page
+            self._pages[key] = page
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return page
+
+    def _load(self, db, after, before) -> dict:
+        limit = self.page_size
+        query = select(*MEMBER_COLUMNS)
+        if before is not None:
+            query = query.where(Member.id < before).order_by(Member.id.desc())
+        else:
+            if after is not None:
+                query = query.where(Member.id > after)
+            query = query.order_by(Member.id)
+
+        # One extra row tells us whether another page exists
+        rows = [dict(row._mapping) for row in db.execute(query.limit(limit + 1))]
+        has_more = len(rows) > limit
+        # The lookahead row decides has_more/has_prev, so the window must cover it:
+        # deleting it (and everything past it) has to drop this page's link
+        lookahead = rows[limit]["id"] if has_more else None
+        rows = rows[:limit]
+
+        if before is not None:
+            rows.reverse()
+            has_prev, has_next = has_more, True
+            # Window is (lo, hi]: from the lookahead row up to the cursor
+            window = (lookahead - 1 if has_more else None, before - 1)
+        else:
+            has_prev, has_next = after is not None, has_more
+            window = (after, lookahead)
+
+        return {
+            "members": rows,
+            "prev_cursor": rows[0]["id"] if rows and has_prev else None,
+            "next_cursor": rows[-1]["id"] if rows and has_next else None,
+            "window": window,
+        }
+
+    def invalidate(self, *member_ids: int):
+        """Drop every cached page whose id window contains one of ``member_ids``."""
+        with self._lock:
+            self._generation += 1
+            stale = [
+                key for key, page in self._pages.items()
+                if any(_in_window(member_id, page["window"]) for member_id in member_ids)
+            ]
+            for key in stale:
+                del self._pages[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._pages.clear()
+
+    def render_metrics(self) -> str:
+        with self._lock:
+            total = self.hits + self.misses
+            hit_rate = self.hits / total if total else 0.0
+            return "\n".join([
+                "# HELP app_member_cache_hits_total Member directory page cache hits.",
+                "# TYPE app_member_cache_hits_total counter",
+                f"app_member_cache_hits_total {self.hits}",
+                "# HELP app_member_cache_misses_total Member directory page cache misses.",
+                "# TYPE app_member_cache_misses_total counter",
+                f"app_member_cache_misses_total {self.misses}",
+                "# HELP app_member_cache_invalidations_total Cached pages dropped by member writes.",
+                "# TYPE app_member_cache_invalidations_total counter",
+                f"app_member_cache_invalidations_total {self.invalidations}",
+                "# HELP app_member_cache_hit_ratio Hits / lookups since start.",
+                "# TYPE app_member_cache_hit_ratio gauge",
+                f"app_member_cache_hit_ratio {hit_rate:.4f}",
+                "# HELP app_member_cache_pages Pages currently cached.",
+                "# TYPE app_member_cache_pages gauge",
+                f"app_member_cache_pages {len(self._pages)}",
+            ]) + "\n"
+
+
+def _in_window(member_id: int, window) -> bool:
+    lo, hi = window
+    return (lo is None or member_id > lo) and (hi is None or member_id <= hi)
+
+
+member_cache = MemberPageCache()
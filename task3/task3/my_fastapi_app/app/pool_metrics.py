@@ -0,0 +1,152 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger("app.pool")
+
+# Checkout wait buckets, in seconds
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class PoolWaitStats:
+    """Checkout wait histogram and timeout count, kept apart from any one pool instance."""
+
+    def __init__(self):
+        self.wait_counts = [0] * (len(WAIT_BUCKETS) + 1)
+        self.wait_sum = 0.0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def record(self, waited: float, timed_out: bool):
+        with self._lock:
+            self.wait_counts[bisect_left(WAIT_BUCKETS, waited)] += 1
+            self.wait_sum += waited
+            self.timeouts += timed_out
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"timeouts": self.timeouts, "wait_counts": list(self.wait_counts), "wait_sum": self.wait_sum}
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection.
+
+    ``engine.dispose()`` swaps in a new pool via ``recreate()``; the new pool
+    keeps the same ``wait_stats`` so the counters stay monotonic.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.wait_stats.record(time.perf_counter() - start, timed_out)
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            **self.wait_stats.snapshot(),
+        }
+
+
+class PoolHealthChecker:
+    """Background replacement for pool_pre_ping.
+
+    Instead of a ``SELECT 1`` on every checkout, ping the database every
+    ``interval`` seconds; if the ping fails, drop the whole pool so requests
+    get fresh connections instead of dead ones.
+    """
+
+    def __init__(self, engine, interval: float = 30.0):
+        self.engine = engine
+        self.interval = interval
+        self.failures = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self) -> bool:
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except Exception as exc:
+            self.failures += 1
+            logger.warning("DB health check failed, disposing pool: %s", exc)
+            self.engine.dispose()
+            return False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="db-pool-health", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+            self._thread = None
+
+
+def render_pool_metrics(engine, health: PoolHealthChecker) -> str:
+    """Prometheus text for the engine's pool."""
+    pool = engine.pool
+    if not isinstance(pool, TimedQueuePool):
+        return ""
+    s = pool.stats()
+    lines = [
+        "# HELP app_db_pool_size Configured pool size.",
+        "# TYPE app_db_pool_size gauge",
+        f"app_db_pool_size {s['size']}",
+        "# HELP app_db_pool_checked_out Connections currently checked out.",
+        "# TYPE app_db_pool_checked_out gauge",
+        f"app_db_pool_checked_out {s['checked_out']}",
+        "# HELP app_db_pool_checked_in Idle connections in the pool.",
+        "# TYPE app_db_pool_checked_in gauge",
+        f"app_db_pool_checked_in {s['checked_in']}",
+        "# HELP app_db_pool_overflow Connections open beyond pool_size.",
+        "# TYPE app_db_pool_overflow gauge",
+        f"app_db_pool_overflow {s['overflow']}",
+        "# HELP app_db_pool_timeouts_total Checkouts that gave up after pool_timeout.",
+        "# TYPE app_db_pool_timeouts_total counter",
+        f"app_db_pool_timeouts_total {s['timeouts']}",
+        "# HELP app_db_pool_health_failures_total Failed background health checks.",
+        "# TYPE app_db_pool_health_failures_total counter",
+        f"app_db_pool_health_failures_total {health.failures}",
+        "# HELP app_db_pool_wait_seconds Time spent waiting for a pooled connection.",
+        "# TYPE app_db_pool_wait_seconds histogram",
+    ]
+    cumulative = 0
+    for bound, count in zip(WAIT_BUCKETS + (float("inf"),), s["wait_counts"]):
+        cumulative += count
+        le = "+Inf" if bound == float("inf") else bound
+        lines.append(f'app_db_pool_wait_seconds_bucket{{le="{le}"}} {cumulative}')
+    lines += [
+        f"app_db_pool_wait_seconds_sum {s['wait_sum']:.6f}",
+        f"app_db_pool_wait_seconds_count {cumulative}",
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,109 @@
+import re
+from sqlalchemy import or_, select, text
+from .models import Member
+
+SEARCH_PAGE_SIZE = 25
+
+# 🔹 SQLite: FTS5 table over members, kept in sync by triggers (covers single and bulk writes)
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS members_fts USING fts5(
+        name, email, phone, organization, content='members', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS members_fts_ai AFTER INSERT ON members BEGIN
+        INSERT INTO members_fts(rowid, name, email, phone, organization)
+        VALUES (new.id, new.name, new.email, new.phone, new.organization);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS members_fts_ad AFTER DELETE ON members BEGIN
+        INSERT INTO members_fts(members_fts, rowid, name, email, phone, organization)
+        VALUES ('delete', old.id, old.name, old.email, old.phone, old.organization);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS members_fts_au AFTER UPDATE ON members BEGIN
+        INSERT INTO members_fts(members_fts, rowid, name, email, phone, organization)
+        VALUES ('delete', old.id, old.name, old.email, old.phone, old.organization);
+        INSERT INTO members_fts(rowid, name, email, phone, organization)
+        VALUES (new.id, new.name, new.email, new.phone, new.organization);
+    END""",
+]
+
+# Rank and page inside the FTS table first, then join only the rows we return
+SQLITE_SEARCH = text("""
+    SELECT m.id, m.name, m.email, m.phone, m.organization
+    FROM (
+        SELECT rowid, rank FROM members_fts
+        WHERE members_fts MATCH :q
+        ORDER BY rank
+        LIMIT :limit OFFSET :offset
+    ) AS hits
+    JOIN members m ON m.id = hits.rowid
+    ORDER BY hits.rank
+""")
+
+# 🔹 MySQL: InnoDB FULLTEXT index, maintained by MySQL itself on every write
+MYSQL_SEARCH = text("""
+    SELECT id, name, email, phone, organization
+    FROM members
+    WHERE MATCH(name, email, phone, organization) AGAINST (:q IN BOOLEAN MODE)
+    ORDER BY MATCH(name, email, phone, organization) AGAINST (:q IN BOOLEAN MODE) DESC
+    LIMIT :limit OFFSET :offset
+""")
+
+
+def setup_search_index(engine):
+    """Create the full-text index for the current dialect (idempotent)."""
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        if dialect == "sqlite":
+            exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'members_fts'")).first()
+            for ddl in SQLITE_DDL:
+                conn.execute(text(ddl))
+            if not exists:
+                # Index rows that were there before the FTS table
+                conn.execute(text("INSERT INTO members_fts(members_fts) VALUES ('rebuild')"))
+        elif dialect == "mysql":
+            exists = conn.execute(text(
+                "SELECT 1 FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = 'members' AND index_name = 'ft_members'"
+            )).first()
+            if not exists:
+                conn.execute(text("ALTER TABLE members ADD FULLTEXT INDEX ft_members (name, email, phone, organization)"))
+
+
+def _terms(query: str):
+    return re.findall(r"\w+", query.lower())
+
+
+def build_match(query: str, dialect: str):
+    """Turn free text into a safe prefix query: every word must match."""
+    terms = _terms(query)
+    if not terms:
+        return None
+    if dialect == "mysql":
+        return " ".join(f"+{t}*" for t in terms)
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def _like_search(terms):
+    """Unindexed fallback for other databases: every term must appear in some column."""
+    columns = (Member.name, Member.email, Member.phone, Member.organization)
+    query = select(Member.id, *columns)
+    for term in terms:
+        query = query.where(or_(*(column.ilike(f"%{term}%") for column in columns)))
+    return query.order_by(Member.id)
+
+
+def search_members(db, query: str, page: int = 1, page_size: int = SEARCH_PAGE_SIZE):
+    """Ranked search; returns (rows as dicts, has_more)."""
+    dialect = db.get_bind().dialect.name
+    match = build_match(query, dialect)
+    if match is None:
+        return [], False
+
+    params = {"q": match, "limit": page_size + 1, "offset": (page - 1) * page_size}
+    if dialect == "mysql":
+        rows = db.execute(MYSQL_SEARCH, params)
+    elif dialect == "sqlite":
+        rows = db.execute(SQLITE_SEARCH, params)
+    else:
+        rows = db.execute(_like_search(_terms(query)).limit(params["limit"]).offset(params["offset"]))
+    rows = [dict(row._mapping) for row in rows]
+    return rows[:page_size], len(rows) > page_size
@@ -0,0 +1,123 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from sqlalchemy import event
+
+logger = logging.getLogger("app.sql")
+
+# 🔹 Tunables (milliseconds / repeat count)
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "200"))
+N_PLUS_ONE_THRESHOLD = int(os.environ.get("N_PLUS_ONE_THRESHOLD", "5"))
+
+
+class RequestSQLStats:
+    """SQL cost of a single request; shared with threadpool routes via the context var."""
+
+    def __init__(self):
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.shapes = Counter()
+        self.n_plus_one = set()
+
+
+_current = ContextVar("request_sql_stats", default=None)
+
+
+# ✅ Process-wide aggregates, rendered by /metrics
+class SQLMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter()
+        self.queries = Counter()
+        self.sql_seconds = defaultdict(float)
+        self.n_plus_one = Counter()
+        self.slow_queries = 0
+
+    def record_request(self, route: str, stats: RequestSQLStats):
+        with self._lock:
+            self.requests[route] += 1
+            self.queries[route] += stats.query_count
+            self.sql_seconds[route] += stats.sql_time
+            self.n_plus_one[route] += len(stats.n_plus_one)
+
+    def record_slow_query(self):
+        with self._lock:
+            self.slow_queries += 1
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                "# HELP app_http_requests_total HTTP requests handled, by route.",
+                "# TYPE app_http_requests_total counter",
+            ]
+            lines += [f'app_http_requests_total{{route="{r}"}} {n}' for r, n in sorted(self.requests.items())]
+            lines += [
+                "# HELP app_sql_queries_total SQL statements executed, by route.",
+                "# TYPE app_sql_queries_total counter",
+            ]
+            lines += [f'app_sql_queries_total{{route="{r}"}} {n}' for r, n in sorted(self.queries.items())]
+            lines += [
+                "# HELP app_sql_seconds_total Time spent in SQL, by route.",
+                "# TYPE app_sql_seconds_total counter",
+            ]
+            lines += [f'app_sql_seconds_total{{route="{r}"}} {s:.6f}' for r, s in sorted(self.sql_seconds.items())]
+            lines += [
+                "# HELP app_sql_n_plus_one_total Statement shapes repeated within one request, by route.",
+                "# TYPE app_sql_n_plus_one_total counter",
+            ]
+            lines += [f'app_sql_n_plus_one_total{{route="{r}"}} {n}' for r, n in sorted(self.n_plus_one.items())]
+            lines += [
+                "# HELP app_sql_slow_queries_total Statements slower than SLOW_QUERY_MS.",
+                "# TYPE app_sql_slow_queries_total counter",
+                f"app_sql_slow_queries_total {self.slow_queries}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+metrics = SQLMetrics()
+
+
+def _shape(statement: str) -> str:
+    return re.sub(r"\s+", " ", statement).strip()
+
+
+# 🔹 Engine instrumentation
+def instrument_engine(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            metrics.record_slow_query()
+            logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, _shape(statement))
+
+        stats = _current.get()
+        if stats is None:
+            return
+        stats.query_count += 1
+        stats.sql_time += elapsed
+        shape = _shape(statement)
+        stats.shapes[shape] += 1
+        if stats.shapes[shape] == N_PLUS_ONE_THRESHOLD:
+            stats.n_plus_one.add(shape)
+            logger.warning("Possible N+1: statement ran %d times in one request: %s", N_PLUS_ONE_THRESHOLD, shape)
+
+
+# 🔹 Per-request tracking (used by the HTTP middleware in main.py)
+def start_request() -> RequestSQLStats:
+    stats = RequestSQLStats()
+    _current.set(stats)
+    return stats
+
+
+def finish_request(route: str, stats: RequestSQLStats):
+    metrics.record_request(route, stats)
@@ -0,0 +1,88 @@
+"""Search benchmark: FTS5 index vs LIKE '%q%' scans on a seeded SQLite database.
+
+Run from the project root (next to app/):
+
+    python bench_search.py --members 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+from sqlalchemy import insert, or_, select
+
+from app.database import Base, SessionLocal, engine
+from app.models import Member
+from app.search import search_members, setup_search_index
+
+FIRST = ["alice", "bob", "carol", "dave", "erin", "frank", "grace", "heidi", "ivan", "judy"]
+LAST = ["smith", "jones", "brown", "taylor", "wilson", "davies", "evans", "thomas", "roberts", "walker"]
+ORGS = ["acme", "globex", "initech", "umbrella", "hooli", "stark", "wayne", "wonka", "cyberdyne", "tyrell"]
+
+
+def seed(total):
+    Base.metadata.create_all(bind=engine)
+    setup_search_index(engine)
+    rng = random.Random(42)
+    db = SessionLocal()
+    for offset in range(0, total, 10_000):
+        db.execute(insert(Member), [
+            {
+                "name": f"{rng.choice(FIRST).title()} {rng.choice(LAST).title()}",
+                "email": f"user{i}@{rng.choice(ORGS)}.com",
+                "phone": f"+1-555-{i:07d}",
+                "organization": f"{rng.choice(ORGS).title()} {rng.choice(['Labs', 'Corp', 'Group'])}",
+            }
+            for i in range(offset, min(offset + 10_000, total))
+        ])
+    db.commit()
+    db.close()
+
+
+def like_search(db, query, limit=25):
+    # limit=None forces the full scan a ranked or counted LIKE search would need
+    columns = (Member.name, Member.email, Member.phone, Member.organization)
+    statement = select(Member.id, *columns)
+    for term in query.split():
+        statement = statement.where(or_(*(column.like(f"%{term}%") for column in columns)))
+    statement = statement.order_by(Member.id)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return db.execute(statement).all()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    seed(args.members)
+    print(f"seeded {args.members} members in {time.perf_counter() - start:.1f}s\n")
+
+    db = SessionLocal()
+    print(f"{'query':<22} {'FTS5 ranked':>12} {'LIKE page':>10} {'LIKE all':>10}")
+    for query in ["grace", "walker", "initech labs", "user4242", "zzz-no-match"]:
+        fts = timed(lambda: search_members(db, query), args.repeat)
+        like = timed(lambda: like_search(db, query), args.repeat)
+        like_all = timed(lambda: like_search(db, query, limit=None), args.repeat)
+        print(f"{query:<22} {fts:>10.2f}ms {like:>8.2f}ms {like_all:>8.2f}ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()